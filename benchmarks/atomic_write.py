@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+"""
+Compare in-place and atomic (staged) writing of zone files: elapsed time and system calls.
+"""
+
+import argparse
+import contextlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lib.configutils import *
+from lib.bindutils import *
+from synthetic import write_zone_yaml
+
+
+def run(zones, dest_dir, atomic):
+    bind_writer = BindConfigWriter(BindDir='/etc/bind', DestDir=dest_dir, MainConfFileName='zones-include.conf',
+                                   OrigArgv='benchmark', Atomic=atomic)
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        bind_writer.create_dnssec_bind_conf(zones, 'benchmark-out-key', 'benchmark-out-key')
+        bind_writer.create_zone_files(zones, False, None, 'benchmark-key')
+        bind_writer.conf_files.commit()
+
+    return time.perf_counter() - start, bind_writer.conf_files.syscall_summary()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Atomic write benchmark')
+    parser.add_argument('--zones', metavar='N', type=int, nargs='+', default=[10000, 100000],
+                        help='Zone counts to measure')
+    parser.add_argument('--tmp-dir', metavar='DIRECTORY',
+                        help='Directory for output, should be on the file system of real output')
+    args = parser.parse_args()
+
+    for zone_count in args.zones:
+        work_dir = tempfile.mkdtemp(dir=args.tmp_dir)
+        try:
+            yaml_file = os.path.join(work_dir, 'zones.yaml')
+            write_zone_yaml(yaml_file, zone_count)
+            zones = ConfigReader.read_zone_list(yaml_file, False)
+            for label, atomic in (("in-place", False), ("atomic", True)):
+                dest_dir = os.path.join(work_dir, label)
+                os.mkdir(dest_dir)
+                elapsed, syscalls = run(zones, dest_dir, atomic)
+                print("%8d zones %-9s %8.3f s  %s" % (zone_count, label, elapsed, syscalls))
+        finally:
+            shutil.rmtree(work_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+"""
+Measure writing a catalog zone of slave zones.
+Checks that the serial is increased only when members change and member labels stay the same.
+"""
+
+import argparse
+import contextlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lib.configutils import *
+from lib.bindutils import *
+
+CATALOG_ZONE = 'catalog.invalid'
+
+
+def zone_set(zone_count, added=False, reverse=False):
+    zones = [Zone(CATALOG_ZONE, False, 'catalog.db', True)]
+    zones += [Zone("zone%07d.example" % idx, False, "named-zone%07d.example" % idx, idx % 2 == 0)
+              for idx in range(zone_count)]
+    if added:
+        zones.append(Zone('added.example', False, 'named-added.example', True))
+    if reverse:
+        zones.reverse()
+
+    return ZoneSet(zones)
+
+
+def run(zones, work_dir):
+    bind_writer = BindConfigWriter(BindDir='/etc/bind', DestDir=work_dir, MainConfFileName='zones-include.conf',
+                                   OrigArgv='benchmark', Incremental=True, Quiet=True)
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        status = bind_writer.create_catalog_zone(zones, CATALOG_ZONE, work_dir)
+        bind_writer.conf_files.commit()
+
+    return time.perf_counter() - start, status, CatalogZone.read_serial('%s/catalog.db' % work_dir)
+
+
+def members(work_dir):
+    with open('%s/catalog.db' % work_dir, "r") as zone_handle:
+        return {line.split()[0]: line.split()[-1] for line in zone_handle if ' PTR ' in line}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Catalog zone benchmark')
+    parser.add_argument('--zones', metavar='N', type=int, nargs='+', default=[10000, 100000],
+                        help='Zone counts to measure')
+    parser.add_argument('--tmp-dir', metavar='DIRECTORY',
+                        help='Directory for output')
+    args = parser.parse_args()
+
+    for zone_count in args.zones:
+        work_dir = tempfile.mkdtemp(dir=args.tmp_dir)
+        try:
+            expected = [
+                ('write', zone_set(zone_count), ConfFileWriter.ADDED, True),
+                ('unchanged', zone_set(zone_count), ConfFileWriter.UNCHANGED, False),
+                ('reordered', zone_set(zone_count, reverse=True), ConfFileWriter.UNCHANGED, False),
+                ('zone added', zone_set(zone_count, added=True), ConfFileWriter.CHANGED, True),
+            ]
+            labels = None
+            previous_serial = None
+            for name, zones, expected_status, serial_increased in expected:
+                elapsed, status, serial = run(zones, work_dir)
+                print("%8d zones: %-10s %8.3f s, %s, serial %d" % (zone_count, name, elapsed, status, serial))
+                if status != expected_status or (previous_serial is not None and
+                                                 CatalogZone.is_newer(serial, previous_serial) != serial_increased):
+                    print("Expected %s and serial %s!" % (expected_status,
+                                                          'increased' if serial_increased else 'kept'))
+                    sys.exit(1)
+                previous_serial = serial
+                if labels is None:
+                    labels = members(work_dir)
+            new_members = members(work_dir)
+            if any(new_members.get(label) != member for label, member in labels.items()):
+                print("Member labels changed!")
+                sys.exit(1)
+            print("%8d zones: %d members, labels kept" % (zone_count, len(new_members)))
+        finally:
+            shutil.rmtree(work_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+"""
+Measure dry-run comparison against an existing tree, with and without a file index.
+Checks that a dry-run reports the same changes as an actual incremental run makes, and none after it.
+"""
+
+import argparse
+import contextlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lib.configutils import *
+from lib.bindutils import *
+from synthetic import write_zone_yaml
+
+
+def run(zones, dest_dir, render_engine, dry_run=False, file_index=None):
+    bind_writer = BindConfigWriter(BindDir='/etc/bind', DestDir=dest_dir, MainConfFileName='zones-include.conf',
+                                   OrigArgv='benchmark', Incremental=True, RenderEngine=render_engine,
+                                   DryRun=dry_run, FileIndex=file_index)
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        bind_writer.create_dnssec_bind_conf(zones, 'benchmark-out-key', 'benchmark-out-key')
+        bind_writer.create_zone_files(zones, False, None, 'benchmark-key')
+        bind_writer.conf_files.commit()
+
+    return time.perf_counter() - start, bind_writer.conf_files
+
+
+def changed_zone_set(yaml_file):
+    zones = ConfigReader.read_zone_list(yaml_file, False)
+    changed_zones = ZoneSet()
+    for zone in zones:
+        if zone.name == 'zone0000001.example':
+            zone = zone._replace(file='named-moved.example')
+        elif zone.name == 'zone0000002.example':
+            # Removed
+            continue
+        changed_zones.add(zone)
+    changed_zones.add(Zone('added.example', True, 'named-added.example', False))
+
+    return changed_zones
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Dry-run benchmark')
+    parser.add_argument('--zones', metavar='N', type=int, nargs='+', default=[10000, 100000],
+                        help='Zone counts to measure')
+    parser.add_argument('--render-engine', choices=['jinja2', 'fast'], default='fast')
+    parser.add_argument('--tmp-dir', metavar='DIRECTORY',
+                        help='Directory for output')
+    args = parser.parse_args()
+
+    for zone_count in args.zones:
+        work_dir = tempfile.mkdtemp(dir=args.tmp_dir)
+        try:
+            yaml_file = os.path.join(work_dir, 'zones.yaml')
+            index_file = os.path.join(work_dir, 'file-index')
+            dest_dir = os.path.join(work_dir, 'dest')
+            os.mkdir(dest_dir)
+            write_zone_yaml(yaml_file, zone_count)
+            zones = ConfigReader.read_zone_list(yaml_file, False)
+            file_index = FileDigestIndex(IndexFile=index_file)
+            elapsed, conf_files = run(zones, dest_dir, args.render_engine, file_index=file_index)
+            file_index.save()
+            print("%8d zones: write %8.3f s" % (zone_count, elapsed))
+
+            changed_zones = changed_zone_set(yaml_file)
+            elapsed, conf_files = run(changed_zones, dest_dir, args.render_engine, dry_run=True)
+            print("%8d zones: dry-run %8.3f s, %s, %s" % (zone_count, elapsed, conf_files.summary(),
+                                                          conf_files.syscall_summary()))
+            dry_run_changes = conf_files.changes
+            dry_run_summary = conf_files.summary()
+            elapsed, conf_files = run(changed_zones, dest_dir, args.render_engine, dry_run=True,
+                                      file_index=FileDigestIndex(IndexFile=index_file))
+            print("%8d zones: dry-run with file index %8.3f s, %s, %s" % (
+                zone_count, elapsed, conf_files.summary(), conf_files.syscall_summary()))
+            if conf_files.changes != dry_run_changes:
+                print("Dry-run with file index reported different changes!")
+                sys.exit(1)
+            diff_lines = sum(1 for line in conf_files.diff())
+
+            elapsed, conf_files = run(changed_zones, dest_dir, args.render_engine)
+            if conf_files.summary() != dry_run_summary:
+                print("Dry-run reported %s, incremental run did %s!" % (dry_run_summary, conf_files.summary()))
+                sys.exit(1)
+            elapsed, conf_files = run(changed_zones, dest_dir, args.render_engine, dry_run=True)
+            if conf_files.changes:
+                print("Dry-run after incremental run reported changes: %s!" % conf_files.changes)
+                sys.exit(1)
+            print("%8d zones: %d changes and %d diff lines, same as done by incremental run" % (
+                zone_count, len(dry_run_changes), diff_lines))
+        finally:
+            shutil.rmtree(work_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+"""
+Measure startup of the configurators with python -X importtime, and check it against a budget.
+Heavy modules must not be imported before they are needed, eg. for --help.
+Exits with 1 if the budget is exceeded or any of the heavy modules is imported at startup.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLI_MODULES = ['lib.cli.master', 'lib.cli.slave', 'lib.cli.hosts']
+CLI_SCRIPTS = ['dnssec-zone-configurator.py', 'dnssec-zone-configurator-slave.py',
+               'dnssec-zone-configurator-hosts.py']
+# Imported only when actually generating, watching or reloading
+LAZY_MODULES = ['jinja2', 'yaml', 'concurrent.futures', 'ctypes', 'subprocess', 'cProfile', 'platform', 'hashlib']
+
+
+def import_times(module):
+    """
+    Import a module in a fresh interpreter
+    :param module: Module to import
+    :return: dict of imported module and its cumulative import time in microseconds
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import %s' % module], cwd=REPO_DIR,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=True)
+    times = {}
+    for line in result.stderr.decode('utf-8').splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative_us)
+
+    return times
+
+
+def wall_time(command, rounds):
+    timings = []
+    for round_idx in range(rounds):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=REPO_DIR, stdout=subprocess.DEVNULL, check=True)
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Startup import time benchmark')
+    parser.add_argument('--rounds', metavar='N', type=int, default=10,
+                        help='Number of interpreter starts per measurement')
+    parser.add_argument('--budget-ms', metavar='MS', type=float, default=150.0,
+                        help='Maximum import time of a configurator, best of rounds. Default 150.')
+    args = parser.parse_args()
+
+    over_budget = False
+    print("%-20s %10s %10s  %s" % ("", "import ms", "--help ms", "heaviest imports"))
+    print("%-20s %10s %10.1f" % ("python -c pass", "", wall_time([sys.executable, '-c', 'pass'], args.rounds) * 1000))
+    for module, script in zip(CLI_MODULES, CLI_SCRIPTS):
+        best = None
+        for round_idx in range(args.rounds):
+            times = import_times(module)
+            if best is None or times[module] < best[module]:
+                best = times
+        lazy_imported = [lazy for lazy in LAZY_MODULES if lazy in best]
+        ancestors = [module.rsplit('.', depth)[0] for depth in range(module.count('.') + 1)]
+        heaviest = sorted((name for name in best if name not in ancestors and
+                           ('.' not in name or name.startswith('lib.'))),
+                          key=lambda name: best[name], reverse=True)[:3]
+        help_ms = wall_time([sys.executable, script, '--help'], args.rounds) * 1000
+        print("%-20s %10.1f %10.1f  %s" % (module, best[module] / 1000, help_ms,
+                                          ', '.join('%s %.1f' % (name, best[name] / 1000) for name in heaviest)))
+        if best[module] / 1000 > args.budget_ms:
+            print("%s: import time %.1f ms is over budget of %.1f ms" % (module, best[module] / 1000, args.budget_ms))
+            over_budget = True
+        if lazy_imported:
+            print("%s: imported at startup: %s" % (module, ', '.join(lazy_imported)))
+            over_budget = True
+
+    if over_budget:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
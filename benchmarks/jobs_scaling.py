@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+"""
+Measure how wall time of writing zone files scales with zone count and --jobs.
+"""
+
+import argparse
+import contextlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lib.configutils import *
+from lib.bindutils import *
+from synthetic import write_zone_yaml
+
+
+def run(yaml_file, dest_dir, jobs):
+    bind_writer = BindConfigWriter(BindDir='/etc/bind', DestDir=dest_dir, MainConfFileName='zones-include.conf',
+                                   OrigArgv='benchmark', Jobs=jobs)
+    zones = ConfigReader.read_zone_list(yaml_file, False)
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        bind_writer.create_zone_files(zones, False, None, 'benchmark-key')
+
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Zone file writing scaling benchmark')
+    parser.add_argument('--zones', metavar='N', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Zone counts to measure')
+    parser.add_argument('--jobs', metavar='N', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help='Worker process counts to measure')
+    parser.add_argument('--tmp-dir', metavar='DIRECTORY', default='/dev/shm' if os.path.isdir('/dev/shm') else None,
+                        help='Directory for output, tmpfs preferred')
+    args = parser.parse_args()
+
+    print("%10s %6s %10s %12s" % ("zones", "jobs", "seconds", "zones/s"))
+    for zone_count in args.zones:
+        work_dir = tempfile.mkdtemp(dir=args.tmp_dir)
+        try:
+            yaml_file = os.path.join(work_dir, 'zones.yaml')
+            write_zone_yaml(yaml_file, zone_count)
+            for jobs in args.jobs:
+                dest_dir = os.path.join(work_dir, 'jobs-%d' % jobs)
+                os.mkdir(dest_dir)
+                elapsed = run(yaml_file, dest_dir, jobs)
+                print("%10d %6d %10.3f %12.0f" % (zone_count, jobs, elapsed, zone_count / elapsed))
+        finally:
+            shutil.rmtree(work_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+"""
+Run both configurator entry points against synthetic zone-YAMLs of growing size.
+Reports time spent in each stage, peak RSS and files written per second.
+Output goes to a tmpfs (/dev/shm) by default to keep disk speed out of the numbers.
+"""
+
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+from synthetic import write_zone_yaml
+
+TIMING_RE = re.compile(r'^Timing: (.+), total ([\d.]+) s\.$')
+STAGE_RE = re.compile(r'^(\S+) ([\d.]+) s$')
+FILES_RE = re.compile(r'^Files: (\d+) added, (\d+) changed, (\d+) removed, (\d+) unchanged\.$')
+KEY_FILE_NAME = 'Kbenchmark-key.+165+00001.private'
+KEY_FILE_CONTENT = """Private-key-format: v1.3
+Algorithm: 165 (HMAC_SHA512)
+Key: YmVuY2htYXJrIGtleSBiZW5jaG1hcmsga2V5IGJlbmNobWFyayBrZXkgYmVuY2htYXJrIGtleQ==
+Bits: AAA=
+"""
+
+
+def run(command, log_file):
+    """
+    Run a configurator
+    :return: (elapsed seconds, peak RSS in kB, dict of stage timings, number of files written)
+    """
+    with open(log_file, "w") as log_handle:
+        start = time.perf_counter()
+        process = subprocess.Popen(command, stdout=log_handle, stderr=subprocess.STDOUT, cwd=REPO_DIR)
+        pid, status, rusage = os.wait4(process.pid, 0)
+        elapsed = time.perf_counter() - start
+        process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode:
+        raise RuntimeError("%s failed, see %s" % (' '.join(command), log_file))
+
+    stages = {}
+    files_written = 0
+    with open(log_file) as log_handle:
+        for line in log_handle:
+            line = line.rstrip('\n')
+            match = TIMING_RE.match(line)
+            if match:
+                for stage in match.group(1).split(', '):
+                    stage_match = STAGE_RE.match(stage)
+                    stages[stage_match.group(1)] = float(stage_match.group(2))
+                continue
+            match = FILES_RE.match(line)
+            if match:
+                files_written = int(match.group(1)) + int(match.group(2))
+
+    return elapsed, rusage.ru_maxrss, stages, files_written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generator pipeline benchmark')
+    parser.add_argument('--zones', metavar='N', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Zone counts to measure, eg. 1000 10000 100000 1000000')
+    parser.add_argument('--tmp-dir', metavar='DIRECTORY', default='/dev/shm' if os.path.isdir('/dev/shm') else None,
+                        help='Directory for YAML-files and output, preferably a tmpfs. Default /dev/shm.')
+    parser.add_argument('--keep', action="store_true",
+                        help="Don't remove the output, for looking at the logs")
+    parser.add_argument('extra_args', metavar='ARGUMENT', nargs='*',
+                        help='Additional arguments for the configurators, after --, eg. -- --jobs 4')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(dir=args.tmp_dir)
+    try:
+        key_file = os.path.join(work_dir, KEY_FILE_NAME)
+        with open(key_file, "w") as key_handle:
+            key_handle.write(KEY_FILE_CONTENT)
+        print("%-6s %8s %9s %9s %10s %9s  %s" % ("script", "zones", "elapsed", "peak RSS", "files", "files/s",
+                                                 "stages"))
+        for zone_count in args.zones:
+            yaml_file = os.path.join(work_dir, 'zones-%d.yaml' % zone_count)
+            write_zone_yaml(yaml_file, zone_count)
+            runs = (
+                ('master', [sys.executable, 'dnssec-zone-configurator.py', yaml_file, key_file]),
+                ('slave', [sys.executable, 'dnssec-zone-configurator-slave.py', yaml_file, '192.0.2.1'])
+            )
+            for label, command in runs:
+                dest_dir = os.path.join(work_dir, '%s-%d' % (label, zone_count))
+                os.mkdir(dest_dir)
+                command += ['--dest-dir', dest_dir, '--profile'] + args.extra_args
+                elapsed, peak_rss, stages, files_written = run(command, '%s.log' % dest_dir)
+                print("%-6s %8d %8.3fs %7.1fMB %10d %9.0f  %s" % (
+                    label, zone_count, elapsed, peak_rss / 1024, files_written, files_written / elapsed,
+                    ', '.join("%s %.3f" % (stage, seconds) for stage, seconds in stages.items())))
+                if not args.keep:
+                    shutil.rmtree(dest_dir)
+    finally:
+        if args.keep:
+            print("Output left in %s" % work_dir)
+        else:
+            shutil.rmtree(work_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+"""
+Measure the on-disk render cache: zone file generation without a cache, with an empty cache and
+with a cache filled by a previous run, including the time to load and save the cache file.
+"""
+
+import argparse
+import contextlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lib.configutils import *
+from lib.bindutils import *
+from synthetic import write_zone_yaml
+
+
+def run(zones, dest_dir, render_engine, cache_file):
+    start = time.perf_counter()
+    render_cache = None
+    if cache_file:
+        render_cache = RenderCache(CacheFile=cache_file)
+    bind_writer = BindConfigWriter(BindDir='/etc/bind', DestDir=dest_dir, MainConfFileName='zones-include.conf',
+                                   OrigArgv='benchmark', Incremental=True, RenderEngine=render_engine,
+                                   RenderCache=render_cache)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        bind_writer.create_zone_files(zones, False, None, 'benchmark-key')
+    if render_cache:
+        render_cache.save()
+
+    return time.perf_counter() - start, bind_writer.render_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render cache benchmark')
+    parser.add_argument('--zones', metavar='N', type=int, nargs='+', default=[10000, 100000],
+                        help='Zone counts to measure')
+    parser.add_argument('--render-engine', choices=['jinja2', 'fast'], nargs='+', default=['jinja2', 'fast'])
+    parser.add_argument('--tmp-dir', metavar='DIRECTORY',
+                        help='Directory for output')
+    args = parser.parse_args()
+
+    for zone_count in args.zones:
+        work_dir = tempfile.mkdtemp(dir=args.tmp_dir)
+        try:
+            yaml_file = os.path.join(work_dir, 'zones.yaml')
+            write_zone_yaml(yaml_file, zone_count)
+            zones = ConfigReader.read_zone_list(yaml_file, False)
+            dest_dir = os.path.join(work_dir, 'out')
+            os.mkdir(dest_dir)
+            for render_engine in args.render_engine:
+                cache_file = os.path.join(work_dir, 'render-cache-%s' % render_engine)
+                for label, cache in (("no cache", None), ("cold cache", cache_file), ("warm cache", cache_file)):
+                    elapsed, render_seconds = run(zones, dest_dir, render_engine, cache)
+                    print("%8d zones %-6s %-10s %8.3f s total, %8.3f s rendering or cache lookups" % (
+                        zone_count, render_engine, label, elapsed, render_seconds))
+                print("%8d zones %-6s cache file %d bytes" % (zone_count, render_engine, os.path.getsize(cache_file)))
+        finally:
+            shutil.rmtree(work_dir)
+
+
+if __name__ == '__main__':
+    main()
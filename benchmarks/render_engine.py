@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+"""
+Check FastTemplate output is byte-for-byte the same as Jinja2 output for the per-zone templates
+and measure renders per second of both engines.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lib.bindutils import *
+
+ZONE_TEMPLATES = ['zone-template-dnssec-signed.j2', 'zone-template-dnssec-unsigned.j2',
+                  'zone-template-unsigned-master.j2', 'zone-template-unsigned-slave.j2',
+                  'zone-template-unsigned-master-tsig.j2', 'zone-template-unsigned-slave-tsig.j2']
+
+# Variations of render parameters the equivalence is checked with
+EQUIVALENCE_PARAMETERS = [
+    {'zone': 'example.com', 'zone_file': 'named-example.com', 'dns_ip': '::1', 'dns_port': 54,
+     'signerd_in_key': 'opendnssec-in', 'zone_key': 'xfr-example'},
+    {'zone': 'example.org', 'zone_file': 'named-zone.example.org.txt', 'dns_ip': '192.0.2.1', 'dns_port': '53',
+     'signerd_in_key': None, 'zone_key': None},
+    {'zone': 'xn--bcher-kva.example', 'zone_file': 'bücher %s %(x)s {{ y }}', 'dns_ip': 'fe80::1%eth0',
+     'dns_port': 0, 'signerd_in_key': 'key "quoted"', 'zone_key': '%(zone)s {{ zone }}'},
+    {'zone': '10.in-addr.arpa', 'zone_file': 1234, 'dns_ip': None, 'dns_port': None, 'signerd_in_key': '',
+     'zone_key': ''},
+    {'zone': 'undefined.example'},
+]
+
+
+def check_equivalence(j2_env):
+    failures = 0
+    for template_name in ZONE_TEMPLATES:
+        fast_template = FastTemplate.compile(j2_env, template_name)
+        if not fast_template:
+            print("%s: not simple, would be rendered with Jinja2" % template_name)
+            continue
+        j2_template = j2_env.get_template(template_name)
+        for parameters in EQUIVALENCE_PARAMETERS:
+            expected = j2_template.render(**parameters).encode('utf-8')
+            actual = fast_template.render(**parameters).encode('utf-8')
+            if expected != actual:
+                failures += 1
+                print("%s: output differs for %r" % (template_name, parameters))
+    print("Equivalence: %d templates x %d parameter sets, %d failures" % (
+        len(ZONE_TEMPLATES), len(EQUIVALENCE_PARAMETERS), failures))
+
+    return failures == 0
+
+
+def renders_per_second(template, renders):
+    start = time.perf_counter()
+    for idx in range(renders):
+        template.render(zone="zone%07d.example" % idx, zone_file="named-zone%07d.example" % idx,
+                        dns_ip='::1', dns_port=54, signerd_in_key='opendnssec-in', zone_key='xfr-example')
+
+    return renders / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fast render engine equivalence check and benchmark')
+    parser.add_argument('--renders', metavar='N', type=int, default=100000,
+                        help='Number of renders per template and engine')
+    args = parser.parse_args()
+
+    j2_env = create_template_environment(bytecode_cache_dir=False)
+    if not check_equivalence(j2_env):
+        sys.exit(1)
+
+    print("%-36s %14s %14s %8s" % ("template", "jinja2/s", "fast/s", "speedup"))
+    for template_name in ZONE_TEMPLATES:
+        j2_rate = renders_per_second(j2_env.get_template(template_name), args.renders)
+        fast_rate = renders_per_second(load_template(j2_env, template_name, 'fast'), args.renders)
+        print("%-36s %14.0f %14.0f %7.1fx" % (template_name, j2_rate, fast_rate, fast_rate / j2_rate))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+"""
+Measure sharded zone includes: generation time, and bytes rewritten when a single zone is added.
+"""
+
+import argparse
+import contextlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lib.configutils import *
+from lib.bindutils import *
+from synthetic import write_zone_yaml
+
+
+def run(zones, dest_dir, shards, shard_by):
+    bind_writer = BindConfigWriter(BindDir='/etc/bind', DestDir=dest_dir, MainConfFileName='zones-include.conf',
+                                   OrigArgv='benchmark', Incremental=True, Shards=shards, ShardBy=shard_by)
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        bind_writer.create_dnssec_bind_conf(zones, 'benchmark-out-key', 'benchmark-out-key')
+        bind_writer.create_zone_files(zones, False, None, 'benchmark-key')
+        bind_writer.conf_files.commit()
+
+    return time.perf_counter() - start
+
+
+def file_states(directory):
+    states = {}
+    for dir_path, dir_names, file_names in os.walk(directory):
+        for file_name in file_names:
+            filename = os.path.join(dir_path, file_name)
+            stat = os.stat(filename)
+            states[filename] = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    return states
+
+
+def bytes_rewritten(before, after):
+    return sum(state[2] for filename, state in after.items() if before.get(filename) != state)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sharded include benchmark')
+    parser.add_argument('--zones', metavar='N', type=int, nargs='+', default=[100000],
+                        help='Zone counts to measure')
+    parser.add_argument('--shards', metavar='N', type=int, nargs='+', default=[0, 16, 256],
+                        help='Shard counts to measure, 0 for no sharding')
+    parser.add_argument('--shard-by', choices=[BindConfigWriter.SHARD_BY_HASH, BindConfigWriter.SHARD_BY_PREFIX],
+                        default=BindConfigWriter.SHARD_BY_HASH)
+    parser.add_argument('--tmp-dir', metavar='DIRECTORY',
+                        help='Directory for output')
+    args = parser.parse_args()
+
+    for zone_count in args.zones:
+        work_dir = tempfile.mkdtemp(dir=args.tmp_dir)
+        try:
+            yaml_file = os.path.join(work_dir, 'zones.yaml')
+            write_zone_yaml(yaml_file, zone_count)
+            zones = ConfigReader.read_zone_list(yaml_file, False)
+            changed_zones = ConfigReader.read_zone_list(yaml_file, False)
+            changed_zones.add(Zone('added.example', True, 'named-added.example', False))
+            for shards in args.shards:
+                dest_dir = os.path.join(work_dir, 'shards-%d' % shards)
+                os.mkdir(dest_dir)
+                elapsed = run(zones, dest_dir, shards, args.shard_by)
+                before = file_states(dest_dir)
+                elapsed_change = run(changed_zones, dest_dir, shards, args.shard_by)
+                rewritten = bytes_rewritten(before, file_states(dest_dir))
+                print("%8d zones %4d shards: full %8.3f s, one zone added %8.3f s, %10d bytes rewritten" % (
+                    zone_count, shards, elapsed, elapsed_change, rewritten))
+                shutil.rmtree(dest_dir)
+        finally:
+            shutil.rmtree(work_dir)
+
+
+if __name__ == '__main__':
+    main()
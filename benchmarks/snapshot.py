@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+"""
+Measure reading zones from a compiled snapshot instead of parsing zone-YAML, and an incremental rerun
+writing only zones changed since the snapshot.
+Checks that zones from the snapshot are the same as parsed ones, and the rerun gives the same files.
+"""
+
+import argparse
+import contextlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lib.configutils import *
+from lib.bindutils import *
+from synthetic import write_zone_yaml
+
+SETTINGS = ('benchmark',)
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+
+    return time.perf_counter() - start, result
+
+
+def run(yaml_file, dest_dir, snapshot_file=None):
+    """
+    Read zones and write an incremental run
+    :return: (elapsed seconds, ZoneSet, ConfFileWriter)
+    """
+    bind_writer = BindConfigWriter(BindDir='/etc/bind', DestDir=dest_dir, MainConfFileName='zones-include.conf',
+                                   OrigArgv='benchmark', Incremental=True, RenderEngine='fast', Quiet=True)
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        previous_zones = None
+        if snapshot_file:
+            snapshot = ZoneSnapshot(snapshot_file, Settings=SETTINGS, DestDir=dest_dir)
+            previous_zones = snapshot.previous_zones()
+            snapshot.generation = ZoneSnapshot.new_generation(dest_dir)
+            zones = snapshot.read_zone_list(yaml_file, False)
+        else:
+            ZoneSnapshot.new_generation(dest_dir)
+            zones = ConfigReader.read_zone_list(yaml_file, False)
+        only_zones = None
+        if previous_zones is not None:
+            only_zones = zones.changed_names(previous_zones)
+        bind_writer.create_dnssec_bind_conf(zones, None, None)
+        bind_writer.create_zone_files(zones, True, None, 'benchmark-key', only_zones=only_zones)
+        bind_writer.conf_files.commit()
+        if snapshot_file:
+            snapshot.save(zones)
+
+    return time.perf_counter() - start, zones, bind_writer.conf_files
+
+
+def tree(directory):
+    files = {}
+    for dir_path, dir_names, file_names in os.walk(directory):
+        for file_name in file_names:
+            if file_name == ZoneSnapshot.GENERATION_FILENAME:
+                # Random, differs anyway
+                continue
+            with open(os.path.join(dir_path, file_name), "rb") as file_handle:
+                files[os.path.relpath(os.path.join(dir_path, file_name), directory)] = file_handle.read()
+
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Zone snapshot benchmark')
+    parser.add_argument('--zones', metavar='N', type=int, nargs='+', default=[10000, 100000],
+                        help='Zone counts to measure')
+    parser.add_argument('--tmp-dir', metavar='DIRECTORY',
+                        help='Directory for output')
+    args = parser.parse_args()
+
+    for zone_count in args.zones:
+        work_dir = tempfile.mkdtemp(dir=args.tmp_dir)
+        try:
+            yaml_file = os.path.join(work_dir, 'zones.yaml')
+            snapshot_file = os.path.join(work_dir, 'snapshot')
+            write_zone_yaml(yaml_file, zone_count)
+
+            elapsed, zones = timed(ConfigReader.read_zone_list, yaml_file, False)
+            print("%8d zones: parse YAML %8.3f s" % (zone_count, elapsed))
+            snapshot = ZoneSnapshot(snapshot_file, Settings=SETTINGS)
+            snapshot.read_zone_list(yaml_file, False)
+            snapshot.save(zones)
+            elapsed, snapshot = timed(ZoneSnapshot, snapshot_file, SETTINGS)
+            elapsed_read, snapshot_zones = timed(snapshot.read_zone_list, yaml_file, False)
+            print("%8d zones: load snapshot %8.3f s, %s" % (zone_count, elapsed + elapsed_read, snapshot.summary()))
+            if list(snapshot_zones) != list(zones) or snapshot_zones.views != zones.views:
+                print("Zones of snapshot differ from parsed ones!")
+                sys.exit(1)
+            os.utime(yaml_file)
+            elapsed, snapshot = timed(ZoneSnapshot, snapshot_file, SETTINGS)
+            elapsed_read, snapshot_zones = timed(snapshot.read_zone_list, yaml_file, False)
+            print("%8d zones: load snapshot %8.3f s, %s" % (zone_count, elapsed + elapsed_read, snapshot.summary()))
+
+            os.unlink(snapshot_file)
+            for name, use_snapshot in (('without snapshot', False), ('with snapshot', True)):
+                dest_dir = os.path.join(work_dir, name.replace(' ', '-'))
+                os.mkdir(dest_dir)
+                write_zone_yaml(yaml_file, zone_count)
+                run(yaml_file, dest_dir, snapshot_file if use_snapshot else None)
+                with open(yaml_file, "a") as yaml_handle:
+                    yaml_handle.write("    - added.example: named-added.example\n")
+                elapsed, zones, conf_files = run(yaml_file, dest_dir, snapshot_file if use_snapshot else None)
+                print("%8d zones: incremental rerun %s %8.3f s, %s" % (zone_count, name, elapsed,
+                                                                       conf_files.summary()))
+            if tree(os.path.join(work_dir, 'without-snapshot')) != tree(os.path.join(work_dir, 'with-snapshot')):
+                print("Rerun with snapshot wrote different files!")
+                sys.exit(1)
+        finally:
+            shutil.rmtree(work_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+"""
+Synthetic zone-YAML generation for benchmarks.
+"""
+
+
+def write_zone_yaml(filename, zone_count, dnssec_every=3, slave_every=2):
+    """
+    Write a zone-YAML with given number of zones
+    :param filename: YAML-file to write
+    :param zone_count: Number of zones
+    :param dnssec_every: Every n:th zone is a DNSSEC-zone, rest are regular
+    :param slave_every: Every n:th zone is slaved
+    :return:
+    """
+    with open(filename, "w") as yaml_handle:
+        yaml_handle.write("---\nzones:\n")
+        for section, is_dnssec in (('dnssec', True), ('regular', False)):
+            yaml_handle.write("  %s:\n" % section)
+            for idx in range(zone_count):
+                if (idx % dnssec_every == 0) != is_dnssec:
+                    continue
+                zone = "zone%07d.example" % idx
+                if idx % slave_every == 0:
+                    yaml_handle.write("    - %s:\n        file: named-%s\n        slave: true\n" % (zone, zone))
+                else:
+                    yaml_handle.write("    - %s: named-%s\n" % (zone, zone))
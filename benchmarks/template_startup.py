@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+"""
+Measure template loading time at startup, excluding imports: no cache, bytecode cache and precompiled templates.
+Every measurement is done in a fresh interpreter, as a real run would.
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+from lib.bindutils.templates import compile_templates
+
+LOAD_TEMPLATES = """
+import os, sys, time
+sys.path.insert(0, %(repo_dir)r)
+from lib.bindutils.templates import create_template_environment
+start = time.perf_counter()
+j2_env = create_template_environment(bytecode_cache_dir=%(cache_dir)r, precompiled_dir=%(precompiled_dir)r)
+for template in j2_env.list_templates() if not %(precompiled_dir)r else os.listdir(%(template_dir)r):
+    j2_env.get_template(template)
+print(time.perf_counter() - start)
+"""
+
+
+def measure(rounds, cache_dir, precompiled_dir):
+    code = LOAD_TEMPLATES % {'repo_dir': REPO_DIR, 'cache_dir': cache_dir, 'precompiled_dir': precompiled_dir,
+                             'template_dir': os.path.join(REPO_DIR, 'templates')}
+    timings = []
+    for round_idx in range(rounds):
+        result = subprocess.run([sys.executable, '-c', code], stdout=subprocess.PIPE, check=True)
+        timings.append(float(result.stdout))
+
+    return min(timings), sum(timings) / len(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Template startup benchmark')
+    parser.add_argument('--rounds', metavar='N', type=int, default=10,
+                        help='Number of interpreter starts per measurement')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        cache_dir = os.path.join(work_dir, 'cache')
+        precompiled_dir = os.path.join(work_dir, 'compiled')
+        compile_templates(precompiled_dir)
+        # Warm up the bytecode cache
+        measure(1, cache_dir, None)
+
+        print("%-20s %10s %10s" % ("", "min ms", "avg ms"))
+        for label, run_cache_dir, run_precompiled_dir in (("no cache", False, None),
+                                                          ("bytecode cache", cache_dir, None),
+                                                          ("precompiled", False, precompiled_dir)):
+            best, average = measure(args.rounds, run_cache_dir, run_precompiled_dir)
+            print("%-20s %10.2f %10.2f" % (label, best * 1000, average * 1000))
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == '__main__':
+    main()
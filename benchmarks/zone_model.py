@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+"""
+Compare memory and time of the Zone/ZoneSet model against the former dict of [bool, file] -lists
+with per-zone template dicts.
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lib.configutils import *
+from lib.bindutils import *
+
+
+def synthetic_zones(zone_count):
+    for idx in range(zone_count):
+        zone = "zone%07d.example" % idx
+        yield zone, idx % 3 == 0, "named-%s" % zone, idx % 2 == 0
+
+
+def dict_model(zone_count):
+    zones = {}
+    for zone, is_dnssec, zone_file, is_slave in synthetic_zones(zone_count):
+        zones[zone] = [is_dnssec, zone_file]
+    # Template input as it used to be built for the include
+    zone_info = []
+    zone_info_private = []
+    for zone in zones:
+        zone_info.append({"zone": zone, "directory_name": "zones.public"})
+        if zones[zone][0]:
+            zone_info_private.append({"zone": zone, "directory_name": "zones.internal"})
+
+    return zones, zone_info, zone_info_private
+
+
+def zone_set_model(zone_count):
+    return ZoneSet(Zone(zone, is_dnssec, zone_file, is_slave)
+                   for zone, is_dnssec, zone_file, is_slave in synthetic_zones(zone_count))
+
+
+def measure(label, func, zone_count):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(zone_count)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print("%-22s %10d zones %8.3f s %10.1f MiB retained %10.1f MiB peak" % (
+        label, zone_count, elapsed, current / 1048576, peak / 1048576))
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Zone model memory and time benchmark')
+    parser.add_argument('--zones', metavar='N', type=int, nargs='+', default=[100000],
+                        help='Zone counts to measure')
+    args = parser.parse_args()
+
+    for zone_count in args.zones:
+        measure("dict of lists + dicts", dict_model, zone_count)
+        zones = measure("ZoneSet", zone_set_model, zone_count)
+
+        bind_writer = BindConfigWriter(BindDir='/etc/bind', OrigArgv='benchmark')
+        template = bind_writer.j2_env.get_template(bind_writer.template_config_dual_view)
+        start = time.perf_counter()
+        template.render(bind_dir='/etc/bind', zones=zones, zones_private=zones.dnssec(),
+                        directory_name='zones.public', private_directory_name='zones.internal')
+        print("%-22s %10d zones %8.3f s" % ("include render", zone_count, time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,9 @@
+#!/usr/bin/env python3
+
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+from lib.cli.hosts import main
+
+
+if __name__ == '__main__':
+    main()
@@ -1 +1,11 @@
-from .confwriter import *
\ No newline at end of file
+from .confwriter import *
+from .filewriter import *
+from .rndc import *
+from .templates import *
+from .fastrender import *
+from .metrics import *
+from .rendercache import *
+from .fileindex import *
+from .zonedata import *
+from .tsigkeys import *
+from .catalog import *
\ No newline at end of file
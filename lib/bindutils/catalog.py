@@ -0,0 +1,74 @@
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+import re
+import time
+
+
+class CatalogZone:
+    """
+    RFC 9432 catalog zone listing zones served to slaves. Slaves having the catalog zone configured
+    add and remove the member zones by themselves, without any configuration change.
+    Members are labeled by a SHA-1 of the zone name in wire format, a zone keeps its label
+    no matter where it is in zone-YAML. SOA serial is increased only when members change. The serial is the time
+    of the change, a catalog zone written again after its file was lost doesn't go back to a serial slaves have seen.
+    """
+    SCHEMA_VERSION = 2
+    SERIAL_RE = re.compile(rb'^@\s+IN\s+SOA\s+\S+\s+\S+\s+(\d+)\s', re.MULTILINE)
+    # SOA-record is near the beginning of a catalog zone file written by us
+    HEAD_LENGTH = 4096
+
+    @staticmethod
+    def member_label(zone_name):
+        """
+        Get the label of a member zone
+        :param zone_name: Name of the member zone
+        :return: Hex SHA-1 of the zone name in DNS wire format
+        """
+        import hashlib
+
+        wire_name = b''
+        for label in zone_name.lower().rstrip('.').split('.'):
+            label = label.encode('idna') if not label.isascii() else label.encode('ascii')
+            wire_name += bytes((len(label),)) + label
+
+        return hashlib.sha1(wire_name + b'\0').hexdigest()
+
+    @staticmethod
+    def read_serial(zone_file):
+        """
+        Get SOA serial of a previously written catalog zone file
+        :param zone_file: Catalog zone file
+        :return: Serial, or None if the file doesn't exist or has no serial
+        """
+        try:
+            with open(zone_file, "rb") as zone_handle:
+                head = zone_handle.read(CatalogZone.HEAD_LENGTH)
+        except FileNotFoundError:
+            return None
+        match = CatalogZone.SERIAL_RE.search(head)
+        if not match:
+            return None
+
+        return int(match.group(1))
+
+    @staticmethod
+    def next_serial(serial):
+        """
+        Increase a serial in serial number arithmetic of RFC 1982. Current time in seconds since the epoch is used,
+        unless the serial is already ahead of it.
+        :param serial: Current serial, None for a new catalog zone
+        :return: Next serial
+        """
+        time_serial = int(time.time()) % (1 << 32)
+        if serial is None or CatalogZone.is_newer(time_serial, serial):
+            return time_serial
+
+        return (serial + 1) % (1 << 32)
+
+    @staticmethod
+    def is_newer(serial, other_serial):
+        """
+        Compare serials in serial number arithmetic of RFC 1982
+        :return: True if serial is greater than other_serial
+        """
+        return 0 < (serial - other_serial) % (1 << 32) < (1 << 31)
@@ -0,0 +1,23 @@
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+"""
+Precompile templates into Python modules.
+Usage: python3 -m lib.bindutils.compile_templates TARGET-DIRECTORY
+"""
+
+import argparse
+from .templates import compile_templates
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompile templates of OpenDNSSEC BIND zone configurator')
+    parser.add_argument('target_dir', metavar='TARGET-DIRECTORY',
+                        help='Directory to write compiled templates to')
+    args = parser.parse_args()
+
+    compile_templates(args.target_dir)
+    print("Templates compiled into %s." % args.target_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,31 +1,40 @@
 # vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
 
 import os
-import platform
-from jinja2 import Environment, FileSystemLoader
-from appdirs import AppDirs
-import re
+import itertools
+import time
+import zlib
+from contextlib import nullcontext
+from .filewriter import ConfFileWriter
+from .fileindex import FileDigestIndex
+from .templates import create_template_environment
+from .fastrender import load_template
+from .tsigkeys import TSIG_ALGORITHMS, TsigKeyReader
+from .catalog import CatalogZone
 
 
 class BindConfigWriter:
     PUBLIC_DIR: str
-    # See: https://www.iana.org/assignments/tsig-algorithm-names/tsig-algorithm-names.xhtml
-    # for list of TSIG algorithms.
-    TSIG_ALGORITHMS = {
-        'HMAC_SHA1': 'hmac-sha1',
-        'HMAC_SHA224': 'hmac-sha224',
-        'HMAC_SHA256': 'hmac-sha256',
-        'HMAC_SHA384': 'hmac-sha384',
-        'HMAC_SHA512': 'hmac-sha512'
-    }
+    TSIG_ALGORITHMS = TSIG_ALGORITHMS
+    # Files are chowned only when running as root, see do_chown()
     DO_CHOWN = None
 
     DEFAULT_BIND_KEY_IN_CONF_FILENAME = 'dnssec-reader-key.conf'
     DEFAULT_BIND_KEY_OUT_CONF_FILENAME = 'dnssec-master-key.conf'
+    DEFAULT_BIND_KEYS_CONF_FILENAME = 'tsig-keys.conf'
+    DEFAULT_BIND_CATALOG_ZONES_CONF_FILENAME = 'catalog-zones.conf'
     DEFAULT_SIGNERD_IP = "::1"
     DEFAULT_SIGNERD_PORT = 54
+    ZONE_BATCH_SIZE = 4096
+    SHARD_BY_HASH = 'hash'
+    SHARD_BY_PREFIX = 'prefix'
+    # Zone names starting with these are spread over the shards in this order when sharding by prefix
+    SHARD_PREFIX_CHARS = '0123456789abcdefghijklmnopqrstuvwxyz'
 
-    def __init__(self, BindDir=None, DestDir=None, MainConfFileName=None, MasterForSlave=None, OrigArgv=None):
+    def __init__(self, BindDir=None, DestDir=None, MainConfFileName=None, MasterForSlave=None, OrigArgv=None,
+                 Incremental=False, Jobs=1, TemplateCacheDir=None, PrecompiledTemplateDir=None,
+                 RenderEngine='jinja2', Atomic=False, Shards=0, ShardBy=SHARD_BY_HASH, Quiet=False,
+                 TemplateEnvironment=None, RenderCache=None, KeyReader=None, DryRun=False, FileIndex=None):
         self.master_ip = MasterForSlave
         self.orig_argv = OrigArgv
 
@@ -34,137 +43,414 @@ class BindConfigWriter:
         self.template_config_plain = 'bind-include-plain-view.j2'
         self.template_config_dual_view = 'bind-include-internal-view.j2'
         self.template_config_key = 'bind-key-include.j2'
+        self.template_config_shard = 'bind-include-shard.j2'
+        self.template_config_keys = 'bind-keys-include.j2'
+        self.template_config_views = 'bind-include-views.j2'
+        self.template_config_view = 'bind-include-view.j2'
+        self.template_config_catalog_zones = 'bind-catalog-zones.j2'
+        self.template_catalog_zone = 'catalog-zone.j2'
         self.TEMPLATE_DNSSEC_UNSIGNED = 'zone-template-dnssec-unsigned.j2'
         self.TEMPLATE_DNSSEC_SIGNED = 'zone-template-dnssec-signed.j2'
         self.TEMPLATE_UNSIGNED_MASTER = 'zone-template-unsigned-master.j2'
         self.TEMPLATE_UNSIGNED_SLAVE = 'zone-template-unsigned-slave.j2'
+        # Zones having their own TSIG key
+        self.TEMPLATE_UNSIGNED_MASTER_TSIG = 'zone-template-unsigned-master-tsig.j2'
+        self.TEMPLATE_UNSIGNED_SLAVE_TSIG = 'zone-template-unsigned-slave-tsig.j2'
 
         self.bind_dir = BindDir
         self.destination_dir = DestDir
         self.bind_main_conf_file = MainConfFileName
         self.INTERNAL_DIR = 'zones.internal'
         self.PUBLIC_DIR = 'zones.public'
+        self.SHARD_DIR = 'zones.shards'
+        # Includes of views defined in zone-YAML, zones of a view are in VIEW_ZONE_DIR_PREFIX + view name
+        self.VIEW_DIR = 'zones.views'
+        self.VIEW_ZONE_DIR_PREFIX = 'zones.view-'
         self.OUT_KEY = 'opendnssec-out'
+        # View names used in bind-include-internal-view.j2
+        self.INTERNAL_VIEW = 'unsigned'
+        self.PUBLIC_VIEW = 'default'
+        self.zone_targets = None
+        self.jobs = Jobs
+        # Number of include files zones are split into, 0 for listing them all in the main include
+        self.shards = Shards
+        self.shard_by = ShardBy
+        # Don't log every file and zone
+        self.quiet = Quiet
+        self.render_seconds = 0.0
+        self.incremental = Incremental
+        self.atomic = Atomic
+        # Render and compare only, see ConfFileWriter.changes
+        self.dry_run = DryRun
+        self.file_index = FileIndex
+        self.conf_files = None
+        self.start_run()
 
         # Initialize Jinja2
-        app_dirs = AppDirs("dnssec-bind-zone-configurator")
-        j2_template_directories = [
-            '%s/templates' % os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
-            '%s/templates' % app_dirs.site_data_dir]
-        j2_template_loader = FileSystemLoader(searchpath=j2_template_directories)
-        self.j2_env = Environment(loader=j2_template_loader, trim_blocks=True)
+        self.template_cache_dir = TemplateCacheDir
+        self.precompiled_template_dir = PrecompiledTemplateDir
+        self.render_engine = RenderEngine
+        if TemplateEnvironment:
+            # Shared with other writers
+            self.j2_env = TemplateEnvironment
+        else:
+            self.j2_env = create_template_environment(bytecode_cache_dir=TemplateCacheDir,
+                                                      precompiled_dir=PrecompiledTemplateDir)
+        self.render_cache = RenderCache
+        if KeyReader:
+            # Shared with other writers
+            self.key_reader = KeyReader
+        else:
+            self.key_reader = TsigKeyReader()
+
+    @staticmethod
+    def do_chown():
+        """
+        Find out once if written files need to be chowned, not at import time
+        :return: True if running as root
+        """
+        if BindConfigWriter.DO_CHOWN is None:
+            # No geteuid() on Windows
+            BindConfigWriter.DO_CHOWN = hasattr(os, 'geteuid') and os.geteuid() == 0
+
+        return BindConfigWriter.DO_CHOWN
+
+    def template_digest(self):
+        """
+        Digest of all the template sources, changes when any of the templates changes
+        :return: Hex digest, or None if template sources are not available, eg. with precompiled templates
+        """
+        import hashlib
+
+        digest = hashlib.sha256()
+        try:
+            for name in self.j2_env.list_templates():
+                source, filename, uptodate = self.j2_env.loader.get_source(self.j2_env, name)
+                digest.update(("%s\0%s\0" % (name, source)).encode('utf-8'))
+        except (TypeError, RuntimeError):
+            return None
+
+        return digest.hexdigest()
+
+    def start_run(self):
+        """
+        Start a new run with fresh file statuses and zone targets, keeping the loaded templates.
+        Needed when regenerating multiple times within the same process.
+        :return:
+        """
+        # Zones configured during this run, list of (zone type, view) as value. Needed for reloading zones.
+        # On a master all zones are here, not only the ones written.
+        self.zone_targets = {}
+        self.render_seconds = 0.0
+        self.conf_files = ConfFileWriter(Incremental=self.incremental, DoChown=BindConfigWriter.do_chown(),
+                                         OwnerName=self.OWNER_NAME, GroupName=self.GROUP_NAME, Atomic=self.atomic,
+                                         DryRun=self.dry_run, FileIndex=self.file_index)
+
+    def create_master_configuration(self, zones, key_file, key_name, signer_ip, out_key_file, out_key_name,
+                                    timer=None, only_zones=None, key_files=None, views=None,
+                                    catalog_zone=None, catalog_dir=None):
+        """
+        Create keys, main include and zone files of a master DNS
+        :param zones: ZoneSet of zones
+        :param key_file: TSIG private key to access OpenDNSSEC signerd for signed zones
+        :param key_name: TSIG key name, None for taking it from key_file name
+        :param signer_ip: OpenDNSSEC signerd IP-address
+        :param out_key_file: TSIG private key for OpenDNSSEC signerd to read unsigned zones, None if not serving
+        :param out_key_name: TSIG key name for out_key_file
+        :param timer: StageTimer to record time spent in stages into, if any
+        :param only_zones: If set, container of zone names to write files for, see create_zone_files()
+        :param key_files: Directory or glob of more TSIG private keys, eg. for zones having their own keys
+        :param views: list of View, if zones are split into views. zones must be a ZoneSet having them all.
+        :param catalog_zone: If set, name of the catalog zone to write, see create_catalog_zone()
+        :param catalog_dir: Directory to write the zone file of catalog_zone into
+        :return:
+        """
+        keys_conf_name = None
+        with self._stage(timer, 'keys'):
+            # Zones can use the keys of signerd too, they are already in their own includes
+            signer_keys = [self.key_reader.read_key(key_file, key_name)]
+            if out_key_file:
+                signer_keys.append(self.key_reader.read_key(out_key_file, out_key_name))
+            keys_conf_name = self._create_zone_keys_conf(zones, key_files, signer_keys)
+        if catalog_zone:
+            with self._stage(timer, 'catalog'):
+                self.create_catalog_zone(zones, catalog_zone, catalog_dir)
+            if only_zones is not None:
+                # Zone configuration of the catalog zone is needed for reloading it
+                only_zones = set(only_zones) | {catalog_zone}
+        out_key_name_used = None
+        if out_key_file:
+            with self._stage(timer, 'keys'):
+                (key_file_name, out_key_name_used) = self.create_dnssec_bind_key_conf(
+                    out_key_file, out_key_name, BindConfigWriter.DEFAULT_BIND_KEY_OUT_CONF_FILENAME)
+        with self._stage(timer, 'include'):
+            self.create_dnssec_bind_conf(zones, out_key_file, out_key_name_used, keys_conf_name=keys_conf_name,
+                                         views=views)
+
+        with self._stage(timer, 'keys'):
+            (key_file_name, in_key_name_used) = self.create_dnssec_bind_key_conf(
+                key_file, key_name, BindConfigWriter.DEFAULT_BIND_KEY_IN_CONF_FILENAME)
+        with self._stage(timer, 'zone_files'):
+            self.create_zone_files(zones, out_key_file is None, signer_ip, in_key_name_used, only_zones=only_zones,
+                                   views=views)
+
+    def create_slave_configuration(self, zones, master_ip, timer=None, only_zones=None, key_files=None, views=None,
+                                   catalog_zone=None):
+        """
+        Create main include and zone files of a slave DNS
+        :param zones: ZoneSet of slave zones
+        :param master_ip: IP-address of the master DNS of this slave DNS
+        :param timer: StageTimer to record time spent in stages into, if any
+        :param only_zones: If set, container of zone names to write files for, see create_zone_files()
+        :param key_files: Directory or glob of TSIG private keys for zones having their own keys
+        :param views: list of View, if zones are split into views
+        :param catalog_zone: If set, configure only this catalog zone of zones. Bind provisions the member zones
+        from it, see create_catalog_zones_conf().
+        :return:
+        """
+        with self._stage(timer, 'catalog'):
+            if catalog_zone:
+                if views:
+                    raise ValueError("Views can not be used with a catalog zone.")
+                catalog = self._catalog_zone(zones, catalog_zone)
+                self._catalog_members(zones, catalog_zone)
+                zones = [catalog]
+                self.create_catalog_zones_conf(zones[0], master_ip)
+            else:
+                self._remove_stale_catalog_zones_conf()
+        with self._stage(timer, 'keys'):
+            keys_conf_name = self._create_zone_keys_conf(zones, key_files)
+        with self._stage(timer, 'include'):
+            self.create_slave_bind_conf(zones, keys_conf_name=keys_conf_name, views=views)
+        with self._stage(timer, 'zone_files'):
+            self.create_zone_files_for_slave(zones, master_ip, only_zones=only_zones, views=views)
+
+    def _create_zone_keys_conf(self, zones, key_files, defined_keys=()):
+        """
+        Create include of the keys in key_files, and check all keys of zones are defined
+        :param zones: Zones having their own keys
+        :param key_files: Directory or glob of TSIG private keys, None if not given
+        :param defined_keys: TsigKeys defined in other includes
+        :return: Include file name relative to Bind directory, None if not written
+        """
+        keys_conf_name = None
+        key_names = {key.name for key in defined_keys}
+        if key_files:
+            bind_conf_file, keys = self.create_bind_keys_conf(key_files, defined_keys=defined_keys)
+            key_names.update(key.name for key in keys)
+            keys_conf_name = BindConfigWriter.DEFAULT_BIND_KEYS_CONF_FILENAME
+        for zone in zones:
+            if zone.key and zone.key not in key_names:
+                if key_files:
+                    raise ValueError("TSIG key %s of zone %s not found from %s." % (zone.key, zone.name, key_files))
+                raise ValueError("TSIG key %s of zone %s not found, no TSIG keys given." % (zone.key, zone.name))
 
-    def create_dnssec_bind_conf(self, zones, out_key_file, out_key_name):
+        return keys_conf_name
+
+    @staticmethod
+    def _stage(timer, name):
+        if timer:
+            return timer.stage(name)
+
+        return nullcontext()
+
+    def create_dnssec_bind_conf(self, zones, out_key_file, out_key_name, keys_conf_name=None, views=None):
         """
         Create the "main" include to manage all DNS zones
-        :param zones: dict of zones to create includes for
+        :param zones: ZoneSet of zones to create includes for
         :param out_key_file: Do configuration for additional key.
         If exists, indicates that this DNS is serving zones for OpenDNSSEC signerd.
         :param out_key_name: Key name to use in Bind configuration
+        :param keys_conf_name: Include file of more keys, relative to Bind directory, see create_bind_keys_conf()
+        :param views: list of View, if zones are split into views
         :return:
         """
-        if BindConfigWriter.DO_CHOWN:
-            uid = pwd.getpwnam(self.OWNER_NAME).pw_uid
-            gid = grp.getgrnam(self.GROUP_NAME).gr_gid
-
         if not self.destination_dir:
             bind_conf_file = self.bind_main_conf_file
         else:
             bind_conf_file = '%s/%s' % (self.destination_dir, self.bind_main_conf_file)
 
+        if views:
+            template = self.j2_env.get_template(self.template_config_views)
+            view_includes = self._create_view_includes(zones, views)
+            self._remove_stale_shards()
+            conf_data = template.render(bind_dir=self.bind_dir, orig_argv=self.orig_argv,
+                                        views=views, view_includes=view_includes,
+                                        zones_private=(zone for zone in zones if zone.dnssec),
+                                        private_directory_name=self.INTERNAL_DIR,
+                                        key_conf_name='dnssec-reader-key.conf',
+                                        key_out_conf_name='dnssec-master-key.conf' if out_key_file else None,
+                                        keys_conf_name=keys_conf_name,
+                                        out_key=out_key_name if out_key_file else None)
+            self._log("Writing %s:" % bind_conf_file)
+            self.conf_files.write(bind_conf_file, conf_data, last=True)
+
+            return bind_conf_file
+
+        self._remove_stale_view_includes(())
+        shards = None
+        private_shards = None
         if out_key_file:
             template = self.j2_env.get_template(self.template_config_dual_view)
+            if self.shards:
+                private_shards = self._create_shards((zone for zone in zones if zone.dnssec), self.INTERNAL_DIR,
+                                                     self.INTERNAL_VIEW)
+                shards = self._create_shards(zones, self.PUBLIC_DIR, self.PUBLIC_VIEW)
         else:
             template = self.j2_env.get_template(self.template_config_plain)
-        zone_info = []
-        zone_info_private = []
-        for zone in zones:
-            zone_item = zones[zone]
-            this_zone_info = {
-                "zone": zone,
-                "directory_name": self.PUBLIC_DIR
-            }
-            zone_info.append(this_zone_info)
-            if zone_item[0]:
-                this_zone_info = {
-                    "zone": zone,
-                    "directory_name": self.INTERNAL_DIR
-                }
-                zone_info_private.append(this_zone_info)
+            if self.shards:
+                shards = self._create_shards(zones, self.PUBLIC_DIR, 'zones')
+        self._remove_stale_shards(shards, private_shards)
         conf_data = template.render(bind_dir=self.bind_dir,
-                                    zones=zone_info, zones_private=zone_info_private,
+                                    zones=zones, zones_private=(zone for zone in zones if zone.dnssec),
+                                    directory_name=self.PUBLIC_DIR, private_directory_name=self.INTERNAL_DIR,
+                                    shards=shards, private_shards=private_shards,
                                     orig_argv=self.orig_argv,
                                     key_conf_name='dnssec-reader-key.conf',
                                     key_out_conf_name='dnssec-master-key.conf',
+                                    keys_conf_name=keys_conf_name,
                                     out_key=out_key_name)
 
-        print("Writing %s:" % bind_conf_file)
-        with open(bind_conf_file, "w") as conf_handle:
-            print(conf_data, file=conf_handle)
-        os.chmod(bind_conf_file, 0o640)
-        if BindConfigWriter.DO_CHOWN:
-            os.chown(bind_conf_file, uid, gid)
+        self._log("Writing %s:" % bind_conf_file)
+        self.conf_files.write(bind_conf_file, conf_data, last=True)
 
         return bind_conf_file
 
-    def create_dnssec_bind_key_conf(self, key_file, key_name, conf_out_filename=DEFAULT_BIND_KEY_IN_CONF_FILENAME):
-        if BindConfigWriter.DO_CHOWN:
-            uid = pwd.getpwnam(self.OWNER_NAME).pw_uid
-            gid = grp.getgrnam(self.GROUP_NAME).gr_gid
+    def create_catalog_zone(self, zones, catalog_zone, catalog_dir):
+        """
+        Write zone file of a RFC 9432 catalog zone having all the slave zones as members.
+        Serial of the previous zone file is increased, if the members changed.
+        :param zones: ZoneSet of zones, catalog_zone being one of them
+        :param catalog_zone: Name of the catalog zone
+        :param catalog_dir: Directory to write the zone file into
+        :return: Status of the zone file
+        """
+        zone_file = '%s/%s' % (catalog_dir, self._catalog_zone(zones, catalog_zone).file)
+        # Sorted, reordering zone-YAML doesn't change the catalog
+        members = [(CatalogZone.member_label(zone_name), zone_name)
+                   for zone_name in sorted(zone.name for zone in self._catalog_members(zones, catalog_zone))]
+        template = self.j2_env.get_template(self.template_catalog_zone)
+        previous_serial = CatalogZone.read_serial(zone_file)
+        zone_data = None
+        if previous_serial is not None:
+            zone_data = template.render(catalog_zone=catalog_zone, version=CatalogZone.SCHEMA_VERSION,
+                                        serial=previous_serial, members=members)
+            if self.conf_files.compare(zone_file, ("%s\n" % zone_data).encode('utf-8')) != \
+                    ConfFileWriter.UNCHANGED:
+                zone_data = None
+        if zone_data is None:
+            zone_data = template.render(catalog_zone=catalog_zone, version=CatalogZone.SCHEMA_VERSION,
+                                        serial=CatalogZone.next_serial(previous_serial), members=members)
+
+        self._log("Writing catalog zone %s, %d members, file %s:" % (catalog_zone, len(members), zone_file))
+        return self.conf_files.write(zone_file, zone_data, zone=catalog_zone)
 
+    def create_catalog_zones_conf(self, zone, master_ip, conf_out_filename=DEFAULT_BIND_CATALOG_ZONES_CONF_FILENAME):
+        """
+        Create catalog-zones statement for a slave DNS, to be included into options of named.conf
+        :param zone: Zone of the catalog zone
+        :param master_ip: IP-address of the master DNS of the member zones
+        :param conf_out_filename: File to write
+        :return: Written file
+        """
         if not self.destination_dir:
             bind_conf_file = conf_out_filename
         else:
             bind_conf_file = '%s/%s' % (self.destination_dir, conf_out_filename)
 
-        # Parse the key file name for possible key name
-        if not key_name:
-            match = re.search(r'^K(.+)\.\+\d{3}\+\d+\.', os.path.basename(key_file))
-            if not match:
-                raise ValueError("Need TSIG key name for file %s." % key_file)
-
-            key_name = match.group(1)
-
-        # Read given TSIG private key file and parse needed information for Bind configuration.
-        key_algorithm = None
-        key_secret = None
-        with open(key_file, encoding='utf-8') as key_handle:
-            for line in key_handle:
-                match = re.search(r'^Algorithm:\s+(\d+)\s+\((.+)\)', line)
-                if match:
-                    if match.group(2) not in BindConfigWriter.TSIG_ALGORITHMS:
-                        raise ValueError(
-                            "Cannot use TSIG key in file %s. Unsupported algorithm %s, need one of HMAC-SHA<bits>." % (
-                                key_file, match.group(2)))
-                    key_algorithm = BindConfigWriter.TSIG_ALGORITHMS[match.group(2)]
-                    continue
+        template = self.j2_env.get_template(self.template_config_catalog_zones)
+        conf_data = template.render(zone=zone, dns_ip=master_ip, orig_argv=self.orig_argv)
 
-                match = re.search(r'^Key:\s+(.+)$', line)
-                if match:
-                    key_secret = match.group(1)
-                    continue
+        self._log("Writing %s:" % bind_conf_file)
+        self.conf_files.write(bind_conf_file, conf_data)
+
+        return bind_conf_file
 
-        if not key_algorithm or not key_secret:
-            raise ValueError(
-                "Cannot use TSIG key in file %s. Cannot parse TSIG key-file." % (key_file))
+    def _remove_stale_catalog_zones_conf(self):
+        if not self.destination_dir:
+            bind_conf_file = BindConfigWriter.DEFAULT_BIND_CATALOG_ZONES_CONF_FILENAME
+        else:
+            bind_conf_file = '%s/%s' % (self.destination_dir, BindConfigWriter.DEFAULT_BIND_CATALOG_ZONES_CONF_FILENAME)
+        if self.conf_files.remove_stale_file(bind_conf_file):
+            self._log("Removed %s" % bind_conf_file)
+
+    @staticmethod
+    def _catalog_zone(zones, catalog_zone):
+        if catalog_zone not in zones or zones[catalog_zone].dnssec or not zones[catalog_zone].slave:
+            raise ValueError("Catalog zone %s must be a regular zone having slave: true in zone-YAML." % catalog_zone)
+
+        return zones[catalog_zone]
+
+    @staticmethod
+    def _catalog_members(zones, catalog_zone):
+        """
+        Get member zones of a catalog zone: all the slave zones
+        :param zones: ZoneSet of zones, catalog_zone being one of them
+        :param catalog_zone: Name of the catalog zone
+        :return: list of Zone
+        """
+        catalog_key = zones[catalog_zone].key
+        members = []
+        for zone in zones.slaves():
+            if zone.name == catalog_zone:
+                continue
+            if zone.key and zone.key != catalog_key:
+                # Slaves transfer members using the primaries and key of the catalog zone
+                raise ValueError("Zone %s has TSIG key %s, members of catalog zone %s can have only its key." % (
+                    zone.name, zone.key, catalog_zone))
+            members.append(zone)
+
+        return members
+
+    def create_dnssec_bind_key_conf(self, key_file, key_name, conf_out_filename=DEFAULT_BIND_KEY_IN_CONF_FILENAME):
+        if not self.destination_dir:
+            bind_conf_file = conf_out_filename
+        else:
+            bind_conf_file = '%s/%s' % (self.destination_dir, conf_out_filename)
+
+        key = self.key_reader.read_key(key_file, key_name)
+        key_name = key.name
+        key_algorithm = key.algorithm
+        key_secret = key.secret
 
         template = self.j2_env.get_template(self.template_config_key)
         conf_data = template.render(key_name=key_name, key_algorithm=key_algorithm, key_secret=key_secret)
 
-        print("Writing %s:" % bind_conf_file)
-        with open(bind_conf_file, "w") as conf_handle:
-            print(conf_data, file=conf_handle)
-        os.chmod(bind_conf_file, 0o640)
-        if BindConfigWriter.DO_CHOWN:
-            os.chown(bind_conf_file, uid, gid)
+        self._log("Writing %s:" % bind_conf_file)
+        self.conf_files.write(bind_conf_file, conf_data)
 
         return bind_conf_file, key_name
 
-    def create_slave_bind_conf(self, zones):
-        if BindConfigWriter.DO_CHOWN:
-            uid = pwd.getpwnam(self.OWNER_NAME).pw_uid
-            gid = grp.getgrnam(self.GROUP_NAME).gr_gid
+    def create_bind_keys_conf(self, key_files, conf_out_filename=DEFAULT_BIND_KEYS_CONF_FILENAME, defined_keys=()):
+        """
+        Create a single include of multiple TSIG keys
+        :param key_files: Directory having K*.private -files, or a glob pattern for them
+        :param conf_out_filename: File to write
+        :param defined_keys: TsigKeys defined in other includes, left out. Bind doesn't allow a key defined twice.
+        :return: (written file, list of TsigKey)
+        """
+        if not self.destination_dir:
+            bind_conf_file = conf_out_filename
+        else:
+            bind_conf_file = '%s/%s' % (self.destination_dir, conf_out_filename)
+
+        defined = {key.name: key for key in defined_keys}
+        keys = []
+        for key in self.key_reader.read_keys(key_files):
+            if key.name not in defined:
+                keys.append(key)
+            elif (key.algorithm, key.secret) != (defined[key.name].algorithm, defined[key.name].secret):
+                raise ValueError("TSIG key %s is in both %s and %s with a different secret." % (
+                    key.name, defined[key.name].file, key.file))
+        template = self.j2_env.get_template(self.template_config_keys)
+        conf_data = template.render(keys=keys)
+
+        self._log("Writing %s:" % bind_conf_file)
+        self.conf_files.write(bind_conf_file, conf_data)
+
+        return bind_conf_file, keys
 
+    def create_slave_bind_conf(self, zones, keys_conf_name=None, views=None):
         if not self.destination_dir:
             internal_dir = self.INTERNAL_DIR
             public_dir = self.PUBLIC_DIR
@@ -174,38 +460,173 @@ class BindConfigWriter:
             public_dir = '%s/%s' % (self.destination_dir, self.PUBLIC_DIR)
             bind_conf_file = '%s/%s' % (self.destination_dir, self.bind_main_conf_file)
 
+        if views:
+            template = self.j2_env.get_template(self.template_config_views)
+            view_includes = self._create_view_includes(zones, views)
+            self._remove_stale_shards()
+            conf_data = template.render(bind_dir=self.bind_dir, orig_argv=self.orig_argv,
+                                        views=views, view_includes=view_includes,
+                                        keys_conf_name=keys_conf_name)
+            self._log("Writing %s:" % bind_conf_file)
+            self.conf_files.write(bind_conf_file, conf_data, last=True)
+
+            return bind_conf_file
+
+        self._remove_stale_view_includes(())
+        shards = None
+        if self.shards:
+            shards = self._create_shards(zones, self.PUBLIC_DIR, 'zones')
+        self._remove_stale_shards(shards)
         template = self.j2_env.get_template(self.template_config_plain)
-        templ_zones = []
-        for zone in zones:
-            zone_item = zones[zone]
-            templ_zone = {
-                "zone": zone,
-                "directory_name": self.PUBLIC_DIR
-            }
-            templ_zones.append(templ_zone)
-        conf_data = template.render(bind_dir=self.bind_dir, zones=templ_zones, orig_argv=self.orig_argv)
+        conf_data = template.render(bind_dir=self.bind_dir, zones=zones, directory_name=self.PUBLIC_DIR,
+                                    shards=shards, keys_conf_name=keys_conf_name, orig_argv=self.orig_argv)
 
-        print("Writing %s:" % bind_conf_file)
-        with open(bind_conf_file, "w") as conf_handle:
-            print(conf_data, file=conf_handle)
-        os.chmod(bind_conf_file, 0o640)
-        if BindConfigWriter.DO_CHOWN:
-            os.chown(bind_conf_file, uid, gid)
+        self._log("Writing %s:" % bind_conf_file)
+        self.conf_files.write(bind_conf_file, conf_data, last=True)
 
         return bind_conf_file
 
-    def create_zone_files(self, zones, dont_serve_signerd_out, master_ip_in, key_name):
+    def shard_of(self, zone_name):
+        """
+        Get the shard a zone is included from
+        :param zone_name: Name of the zone
+        :return: Shard number, 0 to self.shards - 1
+        """
+        if self.shard_by == BindConfigWriter.SHARD_BY_PREFIX:
+            # Alphabetical ranges, zones of a shard have names starting with the same few characters
+            prefix_idx = BindConfigWriter.SHARD_PREFIX_CHARS.find(zone_name[:1].lower())
+            if prefix_idx < 0:
+                prefix_idx = 0
+            return prefix_idx * self.shards // len(BindConfigWriter.SHARD_PREFIX_CHARS)
+
+        # A stable hash, Python's hash() of a str changes between runs
+        return zlib.crc32(zone_name.encode('utf-8')) % self.shards
+
+    def _create_shards(self, zones, directory_name, shard_prefix):
+        """
+        Split zone includes into self.shards files. All of the shards are written, even empty ones,
+        to keep the main include unchanged when zones are added or removed.
+        :param zones: Zones to include
+        :param directory_name: Directory of zone configuration files, relative to Bind directory
+        :param shard_prefix: Start of shard file names
+        :return: list of shard file names relative to Bind directory
+        """
+        if not self.destination_dir:
+            shard_dir = self.SHARD_DIR
+        else:
+            shard_dir = '%s/%s' % (self.destination_dir, self.SHARD_DIR)
+        self._create_zone_dir(shard_dir)
+
+        shard_zones = [[] for _ in range(self.shards)]
+        for zone in zones:
+            shard_zones[self.shard_of(zone.name)].append(zone)
+
+        template = self.j2_env.get_template(self.template_config_shard)
+        shards = []
+        for shard_idx, zones_in_shard in enumerate(shard_zones):
+            shard = '%s/%s-%03d.conf' % (self.SHARD_DIR, shard_prefix, shard_idx)
+            shard_file = '%s/%s-%03d.conf' % (shard_dir, shard_prefix, shard_idx)
+            conf_data = template.render(bind_dir=self.bind_dir, zones=zones_in_shard,
+                                        directory_name=directory_name)
+            self._log("Writing %s:" % shard_file)
+            # Zone files are moved into place before shards referring to them
+            self.conf_files.write(shard_file, conf_data, include=True)
+            shards.append(shard)
+
+        return shards
+
+    def _remove_stale_shards(self, *shard_lists):
+        if not self.destination_dir:
+            shard_dir = self.SHARD_DIR
+        else:
+            shard_dir = '%s/%s' % (self.destination_dir, self.SHARD_DIR)
+        shard_files = {'%s/%s' % (shard_dir, os.path.basename(shard))
+                       for shards in shard_lists if shards for shard in shards}
+        for shard_file in self.conf_files.remove_stale_files(shard_dir, shard_files):
+            self._log("Removed shard %s" % shard_file)
+
+    def view_zone_dir(self, view_name):
+        """
+        Directory of zone configuration files of a view, relative to Bind directory
+        """
+        return '%s%s' % (self.VIEW_ZONE_DIR_PREFIX, view_name)
+
+    def _create_view_includes(self, zones, views):
+        """
+        Write an include for each view. A zone in many views is configured only once, in the first view having it.
+        Other views refer to that one with in-view, both the configuration and the zone data are shared.
+        :param zones: ZoneSet of zones
+        :param views: list of View
+        :return: dict of view name and its include file name relative to Bind directory
+        """
+        if self.shards:
+            raise ValueError("Sharded includes can not be used with views.")
+        if not self.destination_dir:
+            view_dir = self.VIEW_DIR
+        else:
+            view_dir = '%s/%s' % (self.destination_dir, self.VIEW_DIR)
+        self._create_zone_dir(view_dir)
+
+        owners = zones.view_owners()
+        template = self.j2_env.get_template(self.template_config_view)
+        view_includes = {}
+        for view in views:
+            view_zones = ((zone, self.view_zone_dir(view.name),
+                           owners[zone.name] if owners[zone.name] != view.name else None)
+                          for zone in zones if view.has_zone(zone.name))
+            conf_data = template.render(bind_dir=self.bind_dir, zones=view_zones)
+            view_file = '%s/%s.conf' % (view_dir, view.name)
+            self._log("Writing %s:" % view_file)
+            # Zone files are moved into place before view includes referring to them
+            self.conf_files.write(view_file, conf_data, include=True)
+            view_includes[view.name] = '%s/%s.conf' % (self.VIEW_DIR, view.name)
+        self._remove_stale_view_includes(view_includes)
+
+        return view_includes
+
+    def _remove_stale_view_includes(self, view_names):
+        """
+        Remove includes of views no longer in zone-YAML
+        :param view_names: Names of views to keep
+        :return:
+        """
+        if not self.destination_dir:
+            view_dir = self.VIEW_DIR
+        else:
+            view_dir = '%s/%s' % (self.destination_dir, self.VIEW_DIR)
+        view_files = {'%s/%s.conf' % (view_dir, view_name) for view_name in view_names}
+        for view_file in self.conf_files.remove_stale_files(view_dir, view_files):
+            self._log("Removed view %s" % view_file)
+
+    def _remove_stale_view_zone_dirs(self, view_names):
+        """
+        Remove zone configuration files and directories of views no longer in zone-YAML
+        :param view_names: Names of views to keep
+        :return:
+        """
+        destination_dir = self.destination_dir or '.'
+        if not os.path.isdir(destination_dir):
+            return
+        for entry in sorted(os.listdir(destination_dir)):
+            if not entry.startswith(self.VIEW_ZONE_DIR_PREFIX) or \
+                    entry[len(self.VIEW_ZONE_DIR_PREFIX):] in view_names:
+                continue
+            view_zone_dir = '%s/%s' % (destination_dir, entry)
+            self._remove_stale_zone_files(view_zone_dir, ())
+            self.conf_files.remove_empty_dir(view_zone_dir)
+
+    def create_zone_files(self, zones, dont_serve_signerd_out, master_ip_in, key_name, only_zones=None, views=None):
         """
         Create Bind configuration files for all zones
-        :param zones: dict of zones to do
+        :param zones: ZoneSet or an iterable of Zone, eg. ConfigReader.iter_zone_list()
         :param dont_serve_signerd_out: Create internal zones for serving zones from this Bind
         :param master_ip_in: IP-address of OpenDNSSEC signerd master
         :param key_name: TSIG key name in Bind configuration to read data from OpenDNSSEC signerd
+        :param only_zones: If set, container of zone names to write files for. Files of other zones in zones
+        are left as they are, files of zones not in zones are removed.
+        :param views: list of View, if zones are split into views. zones must be a ZoneSet having them all.
         :return:
         """
-        if BindConfigWriter.DO_CHOWN:
-            uid = pwd.getpwnam(self.OWNER_NAME).pw_uid
-            gid = grp.getgrnam(self.GROUP_NAME).gr_gid
         if not self.destination_dir:
             internal_dir = self.INTERNAL_DIR
             public_dir = self.PUBLIC_DIR
@@ -213,110 +634,391 @@ class BindConfigWriter:
             internal_dir = "%s/%s" % (self.destination_dir, self.INTERNAL_DIR)
             public_dir: str = "%s/%s" % (self.destination_dir, self.PUBLIC_DIR)
         if not dont_serve_signerd_out:
-            if not os.path.isdir(internal_dir):
-                os.mkdir(internal_dir, 0o750)
-        if not os.path.isdir(public_dir):
-            os.mkdir(public_dir, 0o750)
-        if BindConfigWriter.DO_CHOWN:
-            if not dont_serve_signerd_out:
-                os.chown(internal_dir, uid, gid)
-            os.chown(public_dir, uid, gid)
+            self._create_zone_dir(internal_dir)
+        owners = None
+        view_dirs = self._create_view_zone_dirs(views)
+        if views:
+            owners = zones.view_owners()
+        else:
+            self._create_zone_dir(public_dir)
 
-        unsigned_template = self.j2_env.get_template(self.TEMPLATE_UNSIGNED_MASTER)
-        dnssec_unsigned_template = self.j2_env.get_template(self.TEMPLATE_DNSSEC_UNSIGNED)
-        dnssec_signed_template = self.j2_env.get_template(self.TEMPLATE_DNSSEC_SIGNED)
+        unsigned_template = self.load_zone_template(self.TEMPLATE_UNSIGNED_MASTER)
+        unsigned_tsig_template = self.load_zone_template(self.TEMPLATE_UNSIGNED_MASTER_TSIG)
+        dnssec_unsigned_template = self.load_zone_template(self.TEMPLATE_DNSSEC_UNSIGNED)
+        dnssec_signed_template = self.load_zone_template(self.TEMPLATE_DNSSEC_SIGNED)
 
         if master_ip_in:
             master_ip = master_ip_in
         else:
             master_ip = BindConfigWriter.DEFAULT_SIGNERD_IP
-        for zone in zones:
-            zone_item = zones[zone]
-            zone_file = zone_item[1]
+        if not dont_serve_signerd_out:
+            internal_view = self.INTERNAL_VIEW
+            public_view = self.PUBLIC_VIEW
+        else:
+            internal_view = None
+            public_view = None
+
+        zone_names = set()
+        dnssec_zone_names = set()
+
+        def zone_tasks():
+            for zone in zones:
+                zone_names.add(zone.name)
+                if zone.dnssec:
+                    dnssec_zone_names.add(zone.name)
+                if owners:
+                    # Zone files of all views are written by the same workers
+                    zone_task = self._zone_task(zone, dont_serve_signerd_out, internal_dir,
+                                                view_dirs[owners[zone.name]],
+                                                unsigned_template, unsigned_tsig_template,
+                                                dnssec_unsigned_template, dnssec_signed_template,
+                                                internal_view, owners[zone.name])
+                else:
+                    zone_task = self._zone_task(zone, dont_serve_signerd_out, internal_dir, public_dir,
+                                                unsigned_template, unsigned_tsig_template,
+                                                dnssec_unsigned_template, dnssec_signed_template,
+                                                internal_view, public_view)
+                if only_zones is not None and zone.name not in only_zones:
+                    # Not written, but zone data of it may need reloading
+                    for template, conf_filename, view in zone_task[2]:
+                        self._add_zone_target(template, zone.name, view)
+                    continue
+                yield zone_task
+
+        self._create_zone_files_in_parallel(zone_tasks(), master_ip, BindConfigWriter.DEFAULT_SIGNERD_PORT, key_name)
+
+        # Get rid of zones no longer in the list
+        if not dont_serve_signerd_out:
+            self._remove_stale_zone_files(internal_dir, dnssec_zone_names)
+        self._remove_stale_public_zone_files(public_dir, zone_names, view_dirs, owners)
+
+    def _create_view_zone_dirs(self, views):
+        """
+        Create zone directories of views
+        :param views: list of View, or None
+        :return: dict of view name and its zone directory
+        """
+        view_dirs = {}
+        for view in views or ():
             if not self.destination_dir:
-                internal_filename = "%s/%s.conf" % (self.INTERNAL_DIR, zone)
-                public_filename: str = "%s/%s.conf" % (self.PUBLIC_DIR, zone)
+                view_dirs[view.name] = self.view_zone_dir(view.name)
             else:
-                internal_filename = "%s/%s/%s.conf" % (self.destination_dir, self.INTERNAL_DIR, zone)
-                public_filename: str = "%s/%s/%s.conf" % (self.destination_dir, self.PUBLIC_DIR, zone)
-            if zone_item[0]:
-                # DNSSEC zone here
-                if not dont_serve_signerd_out:
-                    # Create two Bind zones for given input zone.
-                    # One to serve unsigned master zone to ODS signerd and another signed zone to public
-                    print("DNSSEC zone %s, files %s and %s:" % (zone, public_filename, internal_filename))
-                    self.create_zone_file(dnssec_unsigned_template, zone, internal_filename, zone_file,
-                                          master_ip, BindConfigWriter.DEFAULT_SIGNERD_PORT, key_name)
-                    self.create_zone_file(dnssec_signed_template, zone, public_filename, zone_file,
-                                          master_ip, BindConfigWriter.DEFAULT_SIGNERD_PORT, key_name)
-                else:
-                    # Create only one Bind zone
-                    print("DNSSEC zone %s, file %s:" % (zone, public_filename))
-                    self.create_zone_file(dnssec_signed_template, zone, public_filename, zone_file,
-                                          master_ip, BindConfigWriter.DEFAULT_SIGNERD_PORT, key_name)
+                view_dirs[view.name] = "%s/%s" % (self.destination_dir, self.view_zone_dir(view.name))
+            self._create_zone_dir(view_dirs[view.name])
+
+        return view_dirs
+
+    def _remove_stale_public_zone_files(self, public_dir, zone_names, view_dirs, owners):
+        """
+        Remove files of zones not in the list, and files left in the wrong directory after views changed
+        :param public_dir: Zone directory used without views
+        :param zone_names: Names of all zones
+        :param view_dirs: dict of view name and its zone directory, see _create_view_zone_dirs()
+        :param owners: dict of zone name and the view it is configured in, None without views
+        :return:
+        """
+        if owners:
+            for view_name in view_dirs:
+                self._remove_stale_zone_files(view_dirs[view_name],
+                                              {zone_name for zone_name in owners if owners[zone_name] == view_name})
+            self._remove_stale_zone_files(public_dir, ())
+        else:
+            self._remove_stale_zone_files(public_dir, zone_names)
+        self._remove_stale_view_zone_dirs(view_dirs)
+
+    def _zone_task(self, zone, dont_serve_signerd_out, internal_dir, public_dir,
+                   unsigned_template, unsigned_tsig_template, dnssec_unsigned_template, dnssec_signed_template,
+                   internal_view, public_view):
+        internal_filename = "%s/%s" % (internal_dir, zone.conf_name)
+        public_filename = "%s/%s" % (public_dir, zone.conf_name)
+        if zone.dnssec:
+            # DNSSEC zone here
+            if not dont_serve_signerd_out:
+                # Create two Bind zones for given input zone.
+                # One to serve unsigned master zone to ODS signerd and another signed zone to public
+                message = "DNSSEC zone %s, files %s and %s:" % (zone.name, public_filename, internal_filename)
+                zone_confs = [(dnssec_unsigned_template, internal_filename, internal_view),
+                              (dnssec_signed_template, public_filename, public_view)]
             else:
-                # No DNSSEC, create a master or slave zone depending which one is requested
-                print("Non-DNSSEC zone %s, file %s:" % (zone, public_filename))
-                self.create_zone_file(unsigned_template, zone, public_filename, zone_file,
-                                      master_ip, BindConfigWriter.DEFAULT_SIGNERD_PORT, key_name)
+                # Create only one Bind zone
+                message = "DNSSEC zone %s, file %s:" % (zone.name, public_filename)
+                zone_confs = [(dnssec_signed_template, public_filename, public_view)]
+        else:
+            # No DNSSEC, create a master or slave zone depending which one is requested
+            message = "Non-DNSSEC zone %s, file %s:" % (zone.name, public_filename)
+            if zone.key:
+                zone_confs = [(unsigned_tsig_template, public_filename, public_view)]
+            else:
+                zone_confs = [(unsigned_template, public_filename, public_view)]
+
+        return message, zone, zone_confs
 
-    def create_zone_files_for_slave(self, zones, master_ip):
+    def create_zone_files_for_slave(self, zones, master_ip, only_zones=None, views=None):
         """
         Create Bind configuration files for all zones
-        :param zones: dict of zones to do
+        :param zones: ZoneSet or an iterable of Zone, eg. ConfigReader.iter_zone_list()
         :param master_ip_in: IP-address of master DNS of a slave.
+        :param only_zones: If set, container of zone names to write files for, see create_zone_files()
+        :param views: list of View, if zones are split into views. zones must be a ZoneSet having them all.
         :return:
         """
-        if BindConfigWriter.DO_CHOWN:
-            uid = pwd.getpwnam(self.OWNER_NAME).pw_uid
-            gid = grp.getgrnam(self.GROUP_NAME).gr_gid
         if not self.destination_dir:
             public_dir = self.PUBLIC_DIR
         else:
             public_dir: str = "%s/%s" % (self.destination_dir, self.PUBLIC_DIR)
-        if not os.path.isdir(public_dir):
-            os.mkdir(public_dir, 0o750)
-        if BindConfigWriter.DO_CHOWN:
-            os.chown(public_dir, uid, gid)
+        owners = None
+        view_dirs = self._create_view_zone_dirs(views)
+        if views:
+            owners = zones.view_owners()
+        else:
+            self._create_zone_dir(public_dir)
 
-        unsigned_template = self.j2_env.get_template(self.TEMPLATE_UNSIGNED_SLAVE)
+        unsigned_template = self.load_zone_template(self.TEMPLATE_UNSIGNED_SLAVE)
+        unsigned_tsig_template = self.load_zone_template(self.TEMPLATE_UNSIGNED_SLAVE_TSIG)
+
+        zone_names = set()
+
+        def zone_tasks():
+            for zone in zones:
+                zone_names.add(zone.name)
+                if only_zones is not None and zone.name not in only_zones:
+                    continue
+                view = None
+                if owners:
+                    view = owners[zone.name]
+                    public_filename = "%s/%s" % (view_dirs[view], zone.conf_name)
+                else:
+                    public_filename = "%s/%s" % (public_dir, zone.conf_name)
+                # No DNSSEC, create a master or slave zone depending which one is requested
+                message = "Slave zone %s, file %s:" % (zone.name, public_filename)
+                if zone.key:
+                    yield message, zone, [(unsigned_tsig_template, public_filename, view)]
+                else:
+                    yield message, zone, [(unsigned_template, public_filename, view)]
+
+        self._create_zone_files_in_parallel(zone_tasks(), master_ip, BindConfigWriter.DEFAULT_SIGNERD_PORT, None)
+
+        # Get rid of zones no longer in the list
+        self._remove_stale_public_zone_files(public_dir, zone_names, view_dirs, owners)
+
+    def create_zone_file(self, template, zone, conf_filename, zone_file, master_ip, master_port, key_name,
+                         view=None, zone_key=None):
+        conf_file = self.render_zone_file(template, zone, zone_file, master_ip, master_port, key_name, zone_key)
+        self._add_zone_target(template, zone, view)
+
+        return self.conf_files.write(conf_filename, conf_file, zone=zone)
+
+    def load_zone_template(self, name):
+        """
+        Load a per-zone template using the configured render engine
+        """
+        if self.render_cache is not None:
+            self.render_cache.add_template(self.j2_env, name)
+
+        return load_template(self.j2_env, name, self.render_engine)
+
+    @staticmethod
+    def render_zone_file(template, zone, zone_file, master_ip, master_port, key_name, zone_key=None):
+        return template.render(zone=zone, zone_file=zone_file,
+                               dns_ip=master_ip, dns_port=master_port,
+                               signerd_in_key=key_name, zone_key=zone_key)
+
+    def _create_zone_files_in_parallel(self, zone_tasks, master_ip, master_port, key_name):
+        """
+        Render and write zone configuration files using a pool of self.jobs processes.
+        Output and logging are in the order of zone_tasks no matter how many processes are used.
+        :param zone_tasks: iterable of (log message, Zone, list of (template, conf filename, view))
+        :return:
+        """
+        executor = None
+        # Comparing in memory is cheaper than passing rendered files between processes
+        if self.jobs > 1 and not self.dry_run:
+            conf_files_args = {
+                'Incremental': self.conf_files.incremental,
+                'DoChown': self.conf_files.do_chown,
+                'OwnerName': self.conf_files.owner_name,
+                'GroupName': self.conf_files.group_name,
+                'Atomic': self.conf_files.atomic,
+                'StagingName': self.conf_files.staging_name
+            }
+            if self.file_index is not None:
+                # Only entries of the files written are passed to workers, and the new ones back
+                conf_files_args['FileIndex'] = FileDigestIndex()
+            from concurrent.futures import ProcessPoolExecutor
+
+            executor = ProcessPoolExecutor(max_workers=self.jobs, initializer=_init_zone_file_worker,
+                                           initargs=(conf_files_args, self.template_cache_dir,
+                                                     self.precompiled_template_dir, self.render_engine,
+                                                     master_ip, master_port, key_name,
+                                                     self.render_cache is not None))
+
+        # Zones are processed in batches to avoid keeping all of them in memory
+        zone_tasks = iter(zone_tasks)
+        try:
+            while True:
+                batch = list(itertools.islice(zone_tasks, BindConfigWriter.ZONE_BATCH_SIZE))
+                if not batch:
+                    break
+                if executor:
+                    # Render cache stays in this process, workers get the hits and return rendered misses
+                    cache_keys = [[self._render_cache_key(template, zone, master_ip, master_port, key_name)
+                                   for template, conf_filename, view in zone_confs]
+                                  for message, zone, zone_confs in batch]
+                    worker_tasks = [(zone.name, zone.file, zone.key,
+                                     [(template.name, conf_filename, self._file_index_entry(conf_filename),
+                                       self._render_cache_get(cache_key))
+                                      for (template, conf_filename, view), cache_key in zip(zone_confs, zone_keys)])
+                                    for (message, zone, zone_confs), zone_keys in zip(batch, cache_keys)]
+                    chunk_size = max(1, len(worker_tasks) // (self.jobs * 4))
+                    results = executor.map(_create_zone_files_worker, worker_tasks, chunksize=chunk_size)
+                else:
+                    results = (self._write_zone_confs(zone, zone_confs, master_ip, master_port, key_name)
+                               for message, zone, zone_confs in batch)
+
+                for batch_idx, (zone_task, statuses) in enumerate(zip(batch, results)):
+                    message, zone, zone_confs = zone_task
+                    if executor:
+                        statuses, index_entries, syscalls, write_stats, render_seconds, index_stats, rendered = \
+                            statuses
+                        for cache_key, conf_file in zip(cache_keys[batch_idx], rendered):
+                            if conf_file is not None:
+                                self.render_cache.put(cache_key, conf_file)
+                        self.conf_files.syscalls.update(syscalls)
+                        self.conf_files.write_stats.update(write_stats)
+                        self.render_seconds += render_seconds
+                        if self.file_index is not None:
+                            self.file_index.hits += index_stats[0]
+                            self.file_index.misses += index_stats[1]
+                            for zone_conf, index_entry in zip(zone_confs, index_entries):
+                                if index_entry is not None:
+                                    self.file_index.set_entry(zone_conf[1], index_entry)
+                    self._log(message)
+                    for zone_conf, status in zip(zone_confs, statuses):
+                        template, conf_filename, view = zone_conf
+                        self._add_zone_target(template, zone.name, view)
+                        self.conf_files.record(conf_filename, status, zone=zone.name)
+        finally:
+            if executor:
+                executor.shutdown()
+
+    def _write_zone_confs(self, zone, zone_confs, master_ip, master_port, key_name):
+        statuses = []
+        for template, conf_filename, view in zone_confs:
+            start = time.perf_counter()
+            cache_key = self._render_cache_key(template, zone, master_ip, master_port, key_name)
+            conf_file = self._render_cache_get(cache_key)
+            if conf_file is None:
+                conf_file = self.render_zone_file(template, zone.name, zone.file, master_ip, master_port, key_name,
+                                                  zone.key)
+                if cache_key is not None:
+                    self.render_cache.put(cache_key, conf_file)
+            self.render_seconds += time.perf_counter() - start
+            statuses.append(self.conf_files.write_file(conf_filename, conf_file))
+
+        return statuses
+
+    def _render_cache_key(self, template, zone, master_ip, master_port, key_name):
+        if self.render_cache is None:
+            return None
+
+        return self.render_cache.key(template, zone.name, zone.file, master_ip, master_port, key_name, zone.key)
+
+    def _render_cache_get(self, cache_key):
+        if cache_key is None:
+            return None
+
+        return self.render_cache.get(cache_key)
+
+    def _file_index_entry(self, filename):
+        if self.file_index is None:
+            return None
+
+        return self.file_index.entry(filename)
+
+    def _log(self, message):
+        if not self.quiet:
+            print(message)
+
+    def _add_zone_target(self, template, zone, view):
+        if template.name in (self.TEMPLATE_DNSSEC_SIGNED, self.TEMPLATE_UNSIGNED_SLAVE,
+                             self.TEMPLATE_UNSIGNED_SLAVE_TSIG):
+            zone_type = 'slave'
+        else:
+            zone_type = 'master'
+        self.zone_targets.setdefault(zone, []).append((zone_type, view))
+
+    def _create_zone_dir(self, directory):
+        if self.dry_run:
+            return
+        if not os.path.isdir(directory):
+            os.mkdir(directory, 0o750)
+        if self.conf_files.do_chown:
+            os.chown(directory, self.conf_files.uid, self.conf_files.gid)
+
+    def _remove_stale_zone_files(self, directory, zones):
+        for zone in self.conf_files.remove_stale(directory, zones):
+            self._log("Removed zone %s, file %s/%s.conf" % (zone, directory, zone))
+
+
+# State of a zone file writing worker process, see BindConfigWriter._create_zone_files_in_parallel()
+_zone_file_worker = {}
+
+
+def _init_zone_file_worker(conf_files_args, template_cache_dir, precompiled_template_dir, render_engine,
+                           master_ip, master_port, key_name, return_rendered):
+    _zone_file_worker['j2_env'] = create_template_environment(bytecode_cache_dir=template_cache_dir,
+                                                              precompiled_dir=precompiled_template_dir)
+    _zone_file_worker['render_engine'] = render_engine
+    _zone_file_worker['templates'] = {}
+    _zone_file_worker['conf_files'] = ConfFileWriter(**conf_files_args)
+    _zone_file_worker['render_args'] = (master_ip, master_port, key_name)
+    # Rendered files are passed back to the render cache of the parent process
+    _zone_file_worker['return_rendered'] = return_rendered
+
+
+def _create_zone_files_worker(worker_task):
+    zone, zone_file, zone_key, zone_confs = worker_task
+    templates = _zone_file_worker['templates']
+    master_ip, master_port, key_name = _zone_file_worker['render_args']
+    conf_files = _zone_file_worker['conf_files']
+    file_index = conf_files.file_index
+    statuses = []
+    # New index entries of the files, None if not changed
+    index_entries = []
+    # Files rendered for the render cache, None if cached or no cache is used
+    rendered = []
+    render_seconds = 0.0
+    for template_name, conf_filename, index_entry, conf_file in zone_confs:
+        if conf_file is not None:
+            rendered.append(None)
+        else:
+            if template_name not in templates:
+                templates[template_name] = load_template(_zone_file_worker['j2_env'], template_name,
+                                                         _zone_file_worker['render_engine'])
+            start = time.perf_counter()
+            conf_file = BindConfigWriter.render_zone_file(templates[template_name], zone, zone_file,
+                                                          master_ip, master_port, key_name, zone_key)
+            render_seconds += time.perf_counter() - start
+            rendered.append(conf_file if _zone_file_worker['return_rendered'] else None)
+        if file_index is None:
+            statuses.append(conf_files.write_file(conf_filename, conf_file))
+            index_entries.append(None)
+            continue
+        if index_entry is not None:
+            file_index.set_entry(conf_filename, index_entry)
+        statuses.append(conf_files.write_file(conf_filename, conf_file))
+        new_index_entry = file_index.entry(conf_filename)
+        index_entries.append(new_index_entry if new_index_entry != index_entry else None)
+        # Parent process keeps the index
+        file_index.discard(conf_filename)
+    syscalls = dict(conf_files.syscalls)
+    conf_files.syscalls.clear()
+    write_stats = dict(conf_files.write_stats)
+    conf_files.write_stats.clear()
+    index_stats = (0, 0)
+    if file_index is not None:
+        index_stats = (file_index.hits, file_index.misses)
+        file_index.hits = file_index.misses = 0
+
+    return statuses, index_entries, syscalls, write_stats, render_seconds, index_stats, rendered
 
-        for zone in zones:
-            zone_item = zones[zone]
-            zone_file = zone_item[1]
-            if not self.destination_dir:
-                public_filename: str = "%s/%s.conf" % (self.PUBLIC_DIR, zone)
-            else:
-                public_filename: str = "%s/%s/%s.conf" % (self.destination_dir, self.PUBLIC_DIR, zone)
-            # No DNSSEC, create a master or slave zone depending which one is requested
-            print("Slave zone %s, file %s:" % (zone, public_filename))
-            self.create_zone_file(unsigned_template, zone, public_filename, zone_file,
-                                  master_ip, BindConfigWriter.DEFAULT_SIGNERD_PORT, None)
-
-    def create_zone_file(self, template, zone, conf_filename, zone_file, master_ip, master_port, key_name):
-        if BindConfigWriter.DO_CHOWN:
-            uid = pwd.getpwnam(self.OWNER_NAME).pw_uid
-            gid = grp.getgrnam(self.GROUP_NAME).gr_gid
-        conf_file = template.render(zone=zone, zone_file=zone_file,
-                                    dns_ip=master_ip, dns_port=master_port,
-                                    signerd_in_key=key_name)
-
-        with open(conf_filename, "w") as zone_handle:
-            print(conf_file, file=zone_handle)
-        os.chmod(conf_filename, 0o640)
-        if BindConfigWriter.DO_CHOWN:
-            os.chown(conf_filename, uid, gid)
-
-
-if platform.system() == 'Windows':
-    import getpass
-
-    BindConfigWriter.DO_CHOWN = False
-else:
-    if os.geteuid() == 0:
-        import pwd
-        import grp
-
-        BindConfigWriter.DO_CHOWN = True
-    else:
-        BindConfigWriter.DO_CHOWN = False
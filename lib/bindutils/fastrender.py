@@ -0,0 +1,87 @@
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+import re
+
+
+class FastTemplate:
+    """
+    Template containing nothing but {{ variable }} -substitutions.
+    Rendered with a single %-formatting operation instead of Jinja2.
+    Use compile() to get one, templates having any logic in them are not accepted.
+    """
+    VARIABLE_RE = re.compile(r'{{\s*([A-Za-z_][A-Za-z0-9_]*)\s*}}')
+
+    def __init__(self, name, source):
+        self.name = name
+        self.variables = []
+        format_parts = []
+        pos = 0
+        for match in FastTemplate.VARIABLE_RE.finditer(source):
+            format_parts.append(source[pos:match.start()].replace('%', '%%'))
+            format_parts.append('%s')
+            self.variables.append(match.group(1))
+            pos = match.end()
+        format_parts.append(source[pos:].replace('%', '%%'))
+        self.format = ''.join(format_parts)
+
+    def render(self, **kwargs):
+        # Undefined variables render as empty, same as with Jinja2
+        return self.format % tuple([kwargs[variable] if variable in kwargs else ''
+                                    for variable in self.variables])
+
+    @staticmethod
+    def is_simple(source):
+        """
+        Check if template source has only plain {{ variable }} -substitutions
+        """
+        if '{%' in source or '{#' in source or '\r' in source:
+            return False
+        remaining = FastTemplate.VARIABLE_RE.sub('', source)
+
+        return '{{' not in remaining and '}}' not in remaining
+
+    @staticmethod
+    def compile(j2_env, name):
+        """
+        Compile a template of Jinja2 environment into FastTemplate
+        :param j2_env: Jinja2 environment having the template
+        :param name: Name of the template
+        :return: FastTemplate, or None if the template is not simple enough
+        """
+        try:
+            source, filename, uptodate = j2_env.loader.get_source(j2_env, name)
+        except (TypeError, RuntimeError):
+            # Precompiled templates don't have sources available
+            return None
+        if not FastTemplate.is_simple(source):
+            return None
+
+        # Jinja2 drops a single trailing newline
+        if not j2_env.keep_trailing_newline and source.endswith('\n'):
+            source = source[:-1]
+        template = FastTemplate(name, source)
+
+        # Make sure the output is the same as Jinja2 would produce
+        probe = {}
+        for idx, variable in enumerate(template.variables):
+            probe[variable] = "<probe %d %%s {{}}>" % idx
+        if template.render(**probe) != j2_env.get_template(name).render(**probe):
+            return None
+
+        return template
+
+
+def load_template(j2_env, name, render_engine):
+    """
+    Load a template for rendering
+    :param j2_env: Jinja2 environment
+    :param name: Name of the template
+    :param render_engine: 'fast' to use FastTemplate for simple templates, 'jinja2' for always using Jinja2
+    :return: Object having render(**kwargs) and name
+    """
+    if render_engine == 'fast':
+        template = FastTemplate.compile(j2_env, name)
+        if template:
+            return template
+
+    return j2_env.get_template(name)
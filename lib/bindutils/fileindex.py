@@ -0,0 +1,106 @@
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+import os
+import marshal
+
+
+class FileDigestIndex:
+    """
+    Size, modification time and digest of written configuration files.
+    A file still having the size and modification time it was written with is compared by digest,
+    without reading it. Any other file is read and compared as usual.
+    """
+    FORMAT_VERSION = 1
+
+    def __init__(self, IndexFile=None):
+        import hashlib
+
+        self.index_file = IndexFile
+        self._sha256 = hashlib.sha256
+        # File name as key, (size, mtime_ns, digest) as value
+        self._entries = {}
+        self._modified = False
+        self.hits = 0
+        self.misses = 0
+        if self.index_file:
+            self.load()
+
+    def digest(self, content):
+        return self._sha256(content).digest()
+
+    def lookup(self, filename, stat):
+        """
+        Get digest of a file without reading it
+        :param filename: File to look up
+        :param stat: os.stat() of the file
+        :return: Digest, or None if the file is not indexed or it was modified after indexing
+        """
+        entry = self._entries.get(filename)
+        if entry is None or entry[0] != stat.st_size or entry[1] != stat.st_mtime_ns:
+            self.misses += 1
+            return None
+        self.hits += 1
+
+        return entry[2]
+
+    def update(self, filename, stat, digest):
+        self._entries[filename] = (stat.st_size, stat.st_mtime_ns, digest)
+        self._modified = True
+
+    def entry(self, filename):
+        """
+        Get index entry of a file, eg. for passing it to another process
+        :param filename: File to get
+        :return: (size, mtime_ns, digest), or None if the file is not indexed
+        """
+        return self._entries.get(filename)
+
+    def set_entry(self, filename, entry):
+        """
+        Set index entry of a file
+        :param filename: File to set
+        :param entry: (size, mtime_ns, digest), see entry()
+        :return:
+        """
+        self._entries[filename] = entry
+        self._modified = True
+
+    def discard(self, filename):
+        if self._entries.pop(filename, None) is not None:
+            self._modified = True
+
+    def __len__(self):
+        return len(self._entries)
+
+    def load(self):
+        """
+        Load index file. A missing, broken or old format index file is ignored.
+        :return:
+        """
+        try:
+            with open(self.index_file, "rb") as index_handle:
+                format_version, entries = marshal.loads(index_handle.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return
+        if format_version != FileDigestIndex.FORMAT_VERSION:
+            return
+        self._entries = entries
+
+    def save(self):
+        """
+        Write index file, if anything changed
+        :return:
+        """
+        if not self.index_file or not self._modified:
+            return
+        index_dir = os.path.dirname(self.index_file)
+        if index_dir:
+            os.makedirs(index_dir, 0o700, exist_ok=True)
+        temp_filename = "%s.%d.tmp" % (self.index_file, os.getpid())
+        with open(temp_filename, "wb") as index_handle:
+            marshal.dump((FileDigestIndex.FORMAT_VERSION, self._entries), index_handle)
+        os.replace(temp_filename, self.index_file)
+        self._modified = False
+
+    def summary(self):
+        return "%d hits, %d misses, %d indexed" % (self.hits, self.misses, len(self._entries))
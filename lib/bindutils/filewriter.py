@@ -0,0 +1,436 @@
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+import os
+import time
+from collections import Counter
+
+
+class ConfFileWriter:
+    """
+    Write generated Bind configuration files into the file system.
+    In incremental mode, files whose content did not change are left untouched and
+    configuration files of zones no longer in the zone list are removed.
+    In atomic mode, files are first written into a staging directory next to their final location
+    and moved into place by commit(). Zone files are moved first, then includes listing them, main include last,
+    so that Bind reloading during a run never sees an include referring to a half-written file.
+    In dry-run mode nothing is written or removed, the changes are only collected, see changes and diff().
+    """
+    ADDED = 'added'
+    CHANGED = 'changed'
+    UNCHANGED = 'unchanged'
+    REMOVED = 'removed'
+    FILE_MODE = 0o640
+
+    def __init__(self, Incremental=False, DoChown=False, OwnerName='root', GroupName='named',
+                 Atomic=False, StagingName=None, DryRun=False, FileIndex=None):
+        self.incremental = Incremental
+        self.do_chown = DoChown
+        self.owner_name = OwnerName
+        self.group_name = GroupName
+        self.uid = None
+        self.gid = None
+        if self.do_chown:
+            # Resolve once per run, not once per file
+            import pwd
+            import grp
+
+            self.uid = pwd.getpwnam(self.owner_name).pw_uid
+            self.gid = grp.getgrnam(self.group_name).gr_gid
+
+        self.dry_run = DryRun
+        # Nothing to stage, when nothing is written
+        self.atomic = Atomic and not DryRun
+        # FileDigestIndex of files written, if any
+        self.file_index = FileIndex
+        if StagingName:
+            self.staging_name = StagingName
+        else:
+            self.staging_name = '.staging-%d' % os.getpid()
+        # New files get their mode at creation, unless umask would take away some of the bits
+        umask = os.umask(0)
+        os.umask(umask)
+        self.mode_needs_chmod = bool(umask & ConfFileWriter.FILE_MODE)
+        self._staging_dirs = set()
+        self._pending = []
+        self._pending_includes = []
+        self._pending_last = []
+        self._pending_removals = []
+        self._pending_dir_removals = []
+        self.syscalls = Counter()
+        # files_written, files_skipped, bytes_written and write_seconds
+        self.write_stats = Counter()
+
+        self.counts = {
+            ConfFileWriter.ADDED: 0,
+            ConfFileWriter.CHANGED: 0,
+            ConfFileWriter.UNCHANGED: 0,
+            ConfFileWriter.REMOVED: 0
+        }
+        # Status of each zone touched during this run, zone name as key
+        self.zone_status = {}
+        # Status of each non-zone file written during this run, file name as key
+        self.file_status = {}
+        # In dry-run mode, (file name, status) of added, changed and removed files in order
+        self.changes = []
+        # In dry-run mode, content of added and changed files, file name as key
+        self._new_content = {}
+
+    def write(self, filename, conf_data, zone=None, last=False, include=False):
+        """
+        Write configuration data into a file
+        :param filename: File to write to
+        :param conf_data: Rendered configuration, a newline is appended at the end
+        :param zone: Name of the zone the file is for, if any
+        :param last: In atomic mode, move this file into place after all others
+        :param include: In atomic mode, move this file into place after zone files and before the main include
+        :return: Status of the file: added, changed or unchanged
+        """
+        status = self.write_file(filename, conf_data)
+        self.record(filename, status, zone=zone, last=last, include=include)
+
+        return status
+
+    def write_file(self, filename, conf_data):
+        """
+        Write configuration data into a file without recording the status.
+        Safe to call from multiple threads and processes, see record().
+        :param filename: File to write to
+        :param conf_data: Rendered configuration, a newline is appended at the end
+        :return: Status of the file: added, changed or unchanged
+        """
+        start = time.perf_counter()
+        content = ("%s\n" % conf_data).encode('utf-8')
+        status = self.compare(filename, content)
+        if self.dry_run:
+            if status != ConfFileWriter.UNCHANGED:
+                self._new_content[filename] = content
+        elif status == ConfFileWriter.UNCHANGED and self.incremental:
+            self.write_stats['files_skipped'] += 1
+        else:
+            stat = None
+            if self.atomic:
+                # Moving into place keeps size and modification time
+                stat = self._write_new_file(self.staged_filename(filename), content)
+            else:
+                with open(filename, "wb") as conf_handle:
+                    conf_handle.write(content)
+                    if self.file_index is not None:
+                        conf_handle.flush()
+                        stat = os.fstat(conf_handle.fileno())
+                        self.syscalls['fstat'] += 1
+                os.chmod(filename, ConfFileWriter.FILE_MODE)
+                self.syscalls.update(('open', 'write', 'close', 'chmod'))
+                if self.do_chown:
+                    os.chown(filename, self.uid, self.gid)
+                    self.syscalls['chown'] += 1
+            if stat is not None:
+                self.file_index.update(filename, stat, self.file_index.digest(content))
+            self.write_stats['files_written'] += 1
+            self.write_stats['bytes_written'] += len(content)
+        self.write_stats['write_seconds'] += time.perf_counter() - start
+
+        return status
+
+    def _write_new_file(self, filename, content):
+        """
+        Create a file with mode and ownership set
+        :param filename: File to create
+        :param content: bytes to write
+        :return: os.fstat() of the written file if keeping file index, otherwise None
+        """
+        stat = None
+        staging_dir = os.path.dirname(filename)
+        if staging_dir not in self._staging_dirs:
+            os.makedirs(staging_dir, 0o750, exist_ok=True)
+            self._staging_dirs.add(staging_dir)
+        # Mode and ownership are set before any data goes in
+        fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, ConfFileWriter.FILE_MODE)
+        self.syscalls['open'] += 1
+        try:
+            if self.mode_needs_chmod:
+                os.fchmod(fd, ConfFileWriter.FILE_MODE)
+                self.syscalls['chmod'] += 1
+            if self.do_chown:
+                os.fchown(fd, self.uid, self.gid)
+                self.syscalls['chown'] += 1
+            written = 0
+            while written < len(content):
+                written += os.write(fd, content[written:])
+                self.syscalls['write'] += 1
+            # Staged files are flushed before they are moved into place, see commit()
+            os.fsync(fd)
+            self.syscalls['fsync'] += 1
+            if self.file_index is not None:
+                stat = os.fstat(fd)
+                self.syscalls['fstat'] += 1
+        finally:
+            os.close(fd)
+            self.syscalls['close'] += 1
+
+        return stat
+
+    def staged_filename(self, filename):
+        return os.path.join(os.path.dirname(filename), self.staging_name, os.path.basename(filename))
+
+    def record(self, filename, status, zone=None, last=False, include=False):
+        """
+        Record status of a written file
+        :param filename: File written
+        :param status: Status returned by write_file()
+        :param zone: Name of the zone the file is for, if any
+        :param last: In atomic mode, move this file into place after all others
+        :param include: In atomic mode, move this file into place after zone files and before the main include
+        :return:
+        """
+        self.counts[status] += 1
+        if zone:
+            self._set_zone_status(zone, status)
+        else:
+            self.file_status[filename] = status
+        if self.dry_run and status != ConfFileWriter.UNCHANGED:
+            self.changes.append((filename, status))
+
+        if self.atomic and not (status == ConfFileWriter.UNCHANGED and self.incremental):
+            if last:
+                self._pending_last.append(filename)
+            elif include:
+                self._pending_includes.append(filename)
+            else:
+                self._pending.append(filename)
+
+    def commit(self):
+        """
+        In atomic mode, move staged files into place. The files were flushed to disk when written,
+        staging directories are flushed before and the destination directories after the renames.
+        Zone files of removed zones are deleted after that.
+        :return:
+        """
+        if not self.atomic:
+            return
+
+        staged_files = self._pending + self._pending_includes + self._pending_last
+        for staging_dir in sorted({os.path.dirname(self.staged_filename(filename)) for filename in staged_files}):
+            self._fsync_dir(staging_dir)
+        directories = set()
+        for filename in staged_files:
+            os.rename(self.staged_filename(filename), filename)
+            self.syscalls['rename'] += 1
+            directories.add(os.path.dirname(filename))
+            self._staging_dirs.add(os.path.dirname(self.staged_filename(filename)))
+        self._pending = []
+        self._pending_includes = []
+        self._pending_last = []
+        for filename in self._pending_removals:
+            os.unlink(filename)
+            self.syscalls['unlink'] += 1
+            directories.add(os.path.dirname(filename))
+        self._pending_removals = []
+        for directory in self._pending_dir_removals:
+            if self._rmdir(directory):
+                directories.discard(directory)
+                directories.add(os.path.dirname(directory))
+        self._pending_dir_removals = []
+
+        # Make the renames durable
+        for directory in sorted(directories):
+            self._fsync_dir(directory)
+
+        self.abort()
+
+    def _fsync_dir(self, directory):
+        dir_fd = os.open(directory or '.', os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+        self.syscalls.update(('open', 'fsync', 'close'))
+
+    def abort(self):
+        """
+        Discard any staged files not committed
+        :return:
+        """
+        for filename in self._pending + self._pending_includes + self._pending_last:
+            staged_filename = self.staged_filename(filename)
+            self._staging_dirs.add(os.path.dirname(staged_filename))
+            try:
+                os.unlink(staged_filename)
+            except FileNotFoundError:
+                pass
+        self._pending = []
+        self._pending_includes = []
+        self._pending_last = []
+        self._pending_removals = []
+        self._pending_dir_removals = []
+        for staging_dir in self._staging_dirs:
+            try:
+                os.rmdir(staging_dir)
+            except OSError:
+                pass
+        self._staging_dirs = set()
+
+    def compare(self, filename, content):
+        """
+        Compare given content to the one already on disk
+        :param filename: File to compare with
+        :param content: bytes to be written
+        :return: Status: added, changed or unchanged
+        """
+        self.syscalls['stat'] += 1
+        try:
+            stat = os.stat(filename)
+        except FileNotFoundError:
+            return ConfFileWriter.ADDED
+        if stat.st_size != len(content):
+            return ConfFileWriter.CHANGED
+        if self.file_index is not None:
+            indexed_digest = self.file_index.lookup(filename, stat)
+            if indexed_digest is not None:
+                # Not modified since written, no need to read it
+                if indexed_digest != self.file_index.digest(content):
+                    return ConfFileWriter.CHANGED
+                return ConfFileWriter.UNCHANGED
+        with open(filename, "rb") as conf_handle:
+            existing_content = conf_handle.read()
+        self.syscalls.update(('open', 'read', 'close'))
+        if existing_content != content:
+            return ConfFileWriter.CHANGED
+        if self.file_index is not None:
+            self.file_index.update(filename, stat, self.file_index.digest(content))
+
+        return ConfFileWriter.UNCHANGED
+
+    def remove_stale(self, directory, zones):
+        """
+        Remove zone configuration files of zones not listed
+        :param directory: Directory containing <zone>.conf -files
+        :param zones: Container of zone names to keep
+        :return: list of removed zone names
+        """
+        removed = []
+        if not self.incremental or not os.path.isdir(directory):
+            return removed
+
+        for entry in sorted(os.listdir(directory)):
+            if not entry.endswith('.conf'):
+                continue
+            zone = entry[:-len('.conf')]
+            if zone in zones:
+                continue
+            self._remove(os.path.join(directory, entry))
+            self._set_zone_status(zone, ConfFileWriter.REMOVED)
+            removed.append(zone)
+
+        return removed
+
+    def remove_stale_files(self, directory, filenames):
+        """
+        Remove .conf -files not listed from a directory
+        :param directory: Directory to clean up
+        :param filenames: Container of file names to keep, with directory
+        :return: list of removed file names
+        """
+        removed = []
+        if not self.incremental or not os.path.isdir(directory):
+            return removed
+
+        for entry in sorted(os.listdir(directory)):
+            filename = os.path.join(directory, entry)
+            if not entry.endswith('.conf') or filename in filenames:
+                continue
+            self._remove(filename)
+            self.file_status[filename] = ConfFileWriter.REMOVED
+            removed.append(filename)
+
+        return removed
+
+    def remove_stale_file(self, filename):
+        """
+        Remove a file no longer generated
+        :param filename: File to remove, if it exists
+        :return: True if removed
+        """
+        if not self.incremental or not os.path.isfile(filename):
+            return False
+        self._remove(filename)
+        self.file_status[filename] = ConfFileWriter.REMOVED
+
+        return True
+
+    def remove_empty_dir(self, directory):
+        """
+        Remove a directory emptied by removing stale files from it. A directory having any other files is kept.
+        :param directory: Directory to remove
+        :return:
+        """
+        if not self.incremental or self.dry_run:
+            return
+        if self.atomic:
+            # Files in it are removed on commit
+            self._pending_dir_removals.append(directory)
+        else:
+            self._rmdir(directory)
+
+    def _rmdir(self, directory):
+        self.syscalls['rmdir'] += 1
+        try:
+            os.rmdir(directory)
+        except OSError:
+            return False
+
+        return True
+
+    def _remove(self, filename):
+        self.counts[ConfFileWriter.REMOVED] += 1
+        if self.dry_run:
+            self.changes.append((filename, ConfFileWriter.REMOVED))
+            return
+        if self.file_index is not None:
+            self.file_index.discard(filename)
+        if self.atomic:
+            # Removed on commit, after the include no longer refers to it
+            self._pending_removals.append(filename)
+        else:
+            os.unlink(filename)
+            self.syscalls['unlink'] += 1
+
+    def _set_zone_status(self, zone, status):
+        # A zone can have multiple files. Any change in them makes the zone changed.
+        previous = self.zone_status.get(zone)
+        if previous is None:
+            self.zone_status[zone] = status
+        elif previous != status:
+            self.zone_status[zone] = ConfFileWriter.CHANGED
+
+    def diff(self):
+        """
+        Unified diff of the changes collected in dry-run mode
+        :return: generator of diff lines, each ending with a newline
+        """
+        import difflib
+
+        for filename, status in self.changes:
+            old_lines = []
+            if status != ConfFileWriter.ADDED:
+                with open(filename, "r", encoding='utf-8', errors='replace') as conf_handle:
+                    old_lines = conf_handle.readlines()
+            new_lines = []
+            if status != ConfFileWriter.REMOVED:
+                new_lines = self._new_content[filename].decode('utf-8').splitlines(keepends=True)
+            for line in difflib.unified_diff(old_lines, new_lines,
+                                             fromfile=filename if status != ConfFileWriter.ADDED else '/dev/null',
+                                             tofile=filename if status != ConfFileWriter.REMOVED else '/dev/null'):
+                if not line.endswith('\n'):
+                    line += '\n\\ No newline at end of file\n'
+                yield line
+
+    def zones_with_status(self, status):
+        return [zone for zone in self.zone_status if self.zone_status[zone] == status]
+
+    def summary(self):
+        return "%d added, %d changed, %d removed, %d unchanged" % (
+            self.counts[ConfFileWriter.ADDED], self.counts[ConfFileWriter.CHANGED],
+            self.counts[ConfFileWriter.REMOVED], self.counts[ConfFileWriter.UNCHANGED])
+
+    def syscall_summary(self):
+        return ', '.join("%s %d" % (syscall, self.syscalls[syscall]) for syscall in sorted(self.syscalls))
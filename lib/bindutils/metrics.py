@@ -0,0 +1,93 @@
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+import os
+import json
+import time
+from .filewriter import ConfFileWriter
+
+METRICS_FORMATS = ['json', 'prometheus']
+PROMETHEUS_PREFIX = 'dnssec_bind_zone_configurator'
+
+
+def collect_metrics(zones, conf_files, durations, success):
+    """
+    Collect metrics of a run
+    :param zones: ZoneSet of zones configured
+    :param conf_files: ConfFileWriter used for writing
+    :param durations: dict of stage name and seconds spent
+    :param success: False if the run failed
+    :return: dict of metrics
+    """
+    dnssec_count = sum(1 for zone in zones if zone.dnssec)
+    slave_count = sum(1 for zone in zones if zone.slave)
+
+    return {
+        'timestamp': time.time(),
+        'success': bool(success),
+        'zones': {
+            'total': len(zones),
+            'dnssec': dnssec_count,
+            'regular': len(zones) - dnssec_count,
+            'slave': slave_count
+        },
+        'files': {
+            ConfFileWriter.ADDED: conf_files.counts[ConfFileWriter.ADDED],
+            ConfFileWriter.CHANGED: conf_files.counts[ConfFileWriter.CHANGED],
+            ConfFileWriter.REMOVED: conf_files.counts[ConfFileWriter.REMOVED],
+            ConfFileWriter.UNCHANGED: conf_files.counts[ConfFileWriter.UNCHANGED]
+        },
+        # Not statuses, a file of any status is either written or skipped
+        'files_written': conf_files.write_stats['files_written'],
+        'files_skipped': conf_files.write_stats['files_skipped'],
+        'bytes_written': conf_files.write_stats['bytes_written'],
+        'durations': dict(durations)
+    }
+
+
+def format_prometheus(metrics):
+    """
+    Format metrics for node_exporter textfile collector
+    :param metrics: dict from collect_metrics()
+    :return: str
+    """
+    lines = []
+
+    def gauge(name, help_text, values):
+        lines.append("# HELP %s_%s %s" % (PROMETHEUS_PREFIX, name, help_text))
+        lines.append("# TYPE %s_%s gauge" % (PROMETHEUS_PREFIX, name))
+        for labels, value in values:
+            lines.append("%s_%s%s %s" % (PROMETHEUS_PREFIX, name, labels, repr(value)))
+
+    gauge('last_run_timestamp_seconds', 'Time of the last run.', [('', metrics['timestamp'])])
+    gauge('last_run_success', 'Whether the last run succeeded.', [('', int(metrics['success']))])
+    gauge('zones', 'Number of zones by type.',
+          [('{type="%s"}' % zone_type, count) for zone_type, count in metrics['zones'].items()])
+    gauge('files', 'Number of configuration files by status.',
+          [('{status="%s"}' % status, count) for status, count in metrics['files'].items()])
+    gauge('files_written_total', 'Number of configuration files written.', [('', metrics['files_written'])])
+    gauge('files_skipped_total', 'Number of unchanged configuration files not written.',
+          [('', metrics['files_skipped'])])
+    gauge('bytes_written', 'Bytes written into configuration files.', [('', metrics['bytes_written'])])
+    gauge('stage_duration_seconds', 'Time spent in each stage of the run.',
+          [('{stage="%s"}' % stage, seconds) for stage, seconds in metrics['durations'].items()])
+
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(filename, metrics, metrics_format):
+    """
+    Write metrics into a file. The file is replaced atomically, a collector never sees a partial file.
+    :param filename: File to write
+    :param metrics: dict from collect_metrics()
+    :param metrics_format: 'json' or 'prometheus'
+    :return:
+    """
+    if metrics_format == 'prometheus':
+        content = format_prometheus(metrics)
+    else:
+        content = json.dumps(metrics, indent=2) + "\n"
+
+    temp_filename = "%s.%d.tmp" % (filename, os.getpid())
+    with open(temp_filename, "w") as metrics_handle:
+        metrics_handle.write(content)
+    os.replace(temp_filename, filename)
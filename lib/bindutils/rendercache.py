@@ -0,0 +1,129 @@
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+import os
+import marshal
+from collections import OrderedDict
+
+
+class RenderCache:
+    """
+    Cache of rendered zone configurations.
+    Shared between BindConfigWriters of different hosts, a zone configuration identical on many hosts
+    is rendered only once. With a cache file, rendered configurations are kept across runs.
+    Entries are keyed by a digest of the template source and the render parameters, a changed template
+    never gets a stale result. Least recently used entries are evicted when there are more than MaxEntries.
+    """
+    FORMAT_VERSION = 2
+    DEFAULT_MAX_ENTRIES = 1000000
+
+    def __init__(self, CacheFile=None, MaxEntries=DEFAULT_MAX_ENTRIES):
+        self.cache_file = CacheFile
+        self.max_entries = MaxEntries
+        self._rendered = OrderedDict()
+        # Template name as key, digest of its source as value
+        self._template_digests = {}
+        self._modified = False
+        # Hits of the least recently used entry, each of them rotates the order by one
+        self._rotations = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if self.cache_file:
+            self.load()
+
+    def add_template(self, j2_env, name):
+        """
+        Make rendering of a template cacheable
+        :param j2_env: Jinja2 environment having the template
+        :param name: Name of the template
+        :return:
+        """
+        try:
+            source, filename, uptodate = j2_env.loader.get_source(j2_env, name)
+        except (TypeError, RuntimeError):
+            # Precompiled templates don't have sources available, renders of those are not cached
+            return
+        import hashlib
+
+        self._template_digests[name] = hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+    def key(self, template, zone, zone_file, master_ip, master_port, key_name, zone_key=None):
+        """
+        Get cache key for a render
+        :return: Key, or None if the template is not cacheable
+        """
+        template_digest = self._template_digests.get(template.name)
+        if not template_digest:
+            return None
+
+        return template_digest, zone, zone_file, master_ip, master_port, key_name, zone_key
+
+    def get(self, key):
+        if key is None:
+            return None
+        conf_data = self._rendered.get(key)
+        if conf_data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            if key == next(reversed(self._rendered)):
+                # Already most recently used
+                return conf_data
+            if key == next(iter(self._rendered)):
+                self._rotations += 1
+            else:
+                self._modified = True
+            self._rendered.move_to_end(key)
+
+        return conf_data
+
+    def put(self, key, conf_data):
+        if key is None:
+            return
+        self._rendered[key] = conf_data
+        self._modified = True
+        while len(self._rendered) > self.max_entries:
+            self._rendered.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self):
+        return len(self._rendered)
+
+    def load(self):
+        """
+        Load cache file. A missing, broken or old format cache file is ignored.
+        :return:
+        """
+        try:
+            with open(self.cache_file, "rb") as cache_handle:
+                format_version, entries = marshal.loads(cache_handle.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return
+        if format_version != RenderCache.FORMAT_VERSION:
+            return
+        # Most recently used are last in the file
+        self._rendered = OrderedDict(entries[-self.max_entries:])
+
+    def save(self):
+        """
+        Write cache file, if anything was added to the cache or the order of use changed.
+        Hitting all entries in the order of use keeps the order, the file is not written then.
+        :return:
+        """
+        if not self.cache_file:
+            return
+        if not self._modified and (not self._rendered or self._rotations % len(self._rendered) == 0):
+            return
+        cache_dir = os.path.dirname(self.cache_file)
+        if cache_dir:
+            os.makedirs(cache_dir, 0o700, exist_ok=True)
+        temp_filename = "%s.%d.tmp" % (self.cache_file, os.getpid())
+        with open(temp_filename, "wb") as cache_handle:
+            marshal.dump((RenderCache.FORMAT_VERSION, list(self._rendered.items())), cache_handle)
+        os.replace(temp_filename, self.cache_file)
+        self._modified = False
+        self._rotations = 0
+
+    def summary(self):
+        return "%d hits, %d misses, %d evicted, %d cached" % (self.hits, self.misses, self.evictions,
+                                                               len(self._rendered))
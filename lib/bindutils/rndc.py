@@ -0,0 +1,155 @@
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+from .filewriter import ConfFileWriter
+
+
+class RndcPlanner:
+    """
+    Plan and run the rndc-commands needed to get Bind up to date with the written configuration.
+    Instead of reloading every zone, only following is done:
+    - rndc reconfig, if any configuration file was added, changed or removed
+    - rndc reload <zone> for changed master zones, and master zones having changed zone data
+    - rndc retransfer <zone> for changed slave zones
+    """
+    DEFAULT_RNDC = 'rndc'
+    DEFAULT_CONCURRENCY = 4
+    DEFAULT_BATCH_SIZE = 100
+
+    def __init__(self, Rndc=DEFAULT_RNDC, Concurrency=DEFAULT_CONCURRENCY, BatchSize=DEFAULT_BATCH_SIZE):
+        self.rndc = Rndc
+        self.concurrency = Concurrency
+        self.batch_size = BatchSize
+        # Commands failed in reload()
+        self.failed = []
+
+    @staticmethod
+    def plan(conf_files, zone_targets, data_changed_zones=()):
+        """
+        Calculate the rndc-commands for changes done by a ConfFileWriter
+        :param conf_files: ConfFileWriter used for writing the configuration
+        :param zone_targets: dict of zones, list of (zone type, view name) -tuples as value.
+        Zones having changed data are reloaded, if they are in zone_targets, even if not written in this run.
+        :param data_changed_zones: Zones having changed zone files, see ZoneDataScanner
+        :return: list of rndc-commands, each being a list of arguments
+        """
+        commands = []
+        needs_reconfig = False
+        for filename in conf_files.file_status:
+            if conf_files.file_status[filename] != ConfFileWriter.UNCHANGED:
+                needs_reconfig = True
+                break
+        if not needs_reconfig:
+            for zone in conf_files.zone_status:
+                if conf_files.zone_status[zone] != ConfFileWriter.UNCHANGED:
+                    needs_reconfig = True
+                    break
+        if needs_reconfig:
+            # Added and removed zones are handled by this. Existing zones get their new configuration.
+            commands.append(['reconfig'])
+
+        for zone in conf_files.zones_with_status(ConfFileWriter.CHANGED):
+            for zone_type, view in zone_targets.get(zone, []):
+                if zone_type == 'slave':
+                    command = ['retransfer', zone]
+                else:
+                    command = ['reload', zone]
+                if view:
+                    command += ['IN', view]
+                commands.append(command)
+
+        # Zones with only their data changed need reloading, if they are masters here
+        for zone in data_changed_zones:
+            if conf_files.zone_status.get(zone) in (ConfFileWriter.ADDED, ConfFileWriter.CHANGED):
+                # Added and loaded by reconfig, or reloaded already
+                continue
+            for zone_type, view in zone_targets.get(zone, []):
+                if zone_type != 'master':
+                    continue
+                command = ['reload', zone]
+                if view:
+                    command += ['IN', view]
+                commands.append(command)
+
+        return commands
+
+    def reload(self, conf_files, zone_targets, data_changed_zones=()):
+        """
+        Plan and run rndc-commands for the changes
+        :param conf_files: ConfFileWriter used for writing the configuration
+        :param zone_targets: dict of zones, list of (zone type, view name) -tuples as value
+        :param data_changed_zones: Zones having changed zone files, see ZoneDataScanner
+        :return: True if all commands succeeded
+        """
+        commands = self.plan(conf_files, zone_targets, data_changed_zones)
+        self.failed = []
+        if not commands:
+            print("No changes, Bind not reloaded.")
+            return True
+        self.failed = self.run(commands)
+        if self.failed:
+            print("%d of %d rndc-commands failed." % (len(self.failed), len(commands)))
+            return False
+
+        return True
+
+    def not_reloaded(self, data_changed_zones):
+        """
+        Zones having changed data, but a failed rndc-command in reload()
+        :param data_changed_zones: Zones given to reload()
+        :return: set of zone names
+        """
+        failed_zones = set()
+        for command in self.failed:
+            if command[0] == 'reconfig':
+                # Added zones were not loaded
+                return set(data_changed_zones)
+            failed_zones.add(command[1])
+
+        return failed_zones.intersection(data_changed_zones)
+
+    def run(self, commands):
+        """
+        Execute rndc-commands. A reconfig is done first, zone commands are executed in batches in parallel.
+        :param commands: list of rndc-commands as returned by plan()
+        :return: list of failed commands
+        """
+        failed = []
+        zone_commands = []
+        for command in commands:
+            if command[0] == 'reconfig':
+                if not self._report(command, self._run_command(command)):
+                    failed.append(command)
+            else:
+                zone_commands.append(command)
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for batch_start in range(0, len(zone_commands), self.batch_size):
+                batch = zone_commands[batch_start:batch_start + self.batch_size]
+                # Report in order of the plan, no matter in which order the commands finish
+                for command, error in zip(batch, executor.map(self._run_command, batch)):
+                    if not self._report(command, error):
+                        failed.append(command)
+
+        return failed
+
+    def _run_command(self, command):
+        import subprocess
+
+        try:
+            result = subprocess.run([self.rndc] + command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        except OSError as exc:
+            return str(exc)
+        if result.returncode != 0:
+            return result.stdout.decode('utf-8', 'replace').strip()
+
+        return None
+
+    def _report(self, command, error):
+        if error is not None:
+            print("Failed: %s %s: %s" % (self.rndc, ' '.join(command), error))
+            return False
+        print("Ran: %s %s" % (self.rndc, ' '.join(command)))
+
+        return True
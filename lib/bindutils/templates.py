@@ -0,0 +1,70 @@
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+import os
+
+APP_NAME = "dnssec-bind-zone-configurator"
+_app_dirs = None
+
+
+def app_dirs():
+    """
+    AppDirs of this application, looked up only once
+    """
+    global _app_dirs
+    if not _app_dirs:
+        from appdirs import AppDirs
+
+        _app_dirs = AppDirs(APP_NAME)
+
+    return _app_dirs
+
+
+def template_directories():
+    return [
+        '%s/templates' % os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+        '%s/templates' % app_dirs().site_data_dir]
+
+
+def default_template_cache_dir():
+    return '%s/templates' % app_dirs().user_cache_dir
+
+
+def create_template_environment(bytecode_cache_dir=None, precompiled_dir=None):
+    """
+    Create Jinja2 environment for the templates
+    :param bytecode_cache_dir: Directory to cache compiled templates in. None for default, False for no caching.
+    :param precompiled_dir: Directory of templates compiled with compile_templates(). These are used instead of
+    template sources, if found.
+    :return: Jinja2 Environment
+    """
+    # Jinja2 takes most of the import time, import it only when templates are needed
+    from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, ChoiceLoader, ModuleLoader
+
+    j2_template_loader = FileSystemLoader(searchpath=template_directories())
+    if precompiled_dir and os.path.isdir(precompiled_dir):
+        j2_template_loader = ChoiceLoader([ModuleLoader(precompiled_dir), j2_template_loader])
+
+    bytecode_cache = None
+    if bytecode_cache_dir is None:
+        bytecode_cache_dir = default_template_cache_dir()
+    if bytecode_cache_dir:
+        try:
+            os.makedirs(bytecode_cache_dir, 0o700, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(directory=bytecode_cache_dir)
+        except OSError:
+            # No cache, if cannot have one
+            pass
+
+    return Environment(loader=j2_template_loader, trim_blocks=True, bytecode_cache=bytecode_cache)
+
+
+def compile_templates(target_dir):
+    """
+    Compile all templates into Python modules to be loaded with precompiled_dir of create_template_environment()
+    :param target_dir: Directory to write compiled templates to
+    :return:
+    """
+    j2_env = create_template_environment(bytecode_cache_dir=False)
+    os.makedirs(target_dir, exist_ok=True)
+    j2_env.compile_templates(target_dir, zip=None, ignore_errors=False)
+
@@ -0,0 +1,114 @@
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+import os
+import re
+import glob
+from typing import NamedTuple
+
+# See: https://www.iana.org/assignments/tsig-algorithm-names/tsig-algorithm-names.xhtml
+# for list of TSIG algorithms.
+TSIG_ALGORITHMS = {
+    'HMAC_SHA1': 'hmac-sha1',
+    'HMAC_SHA224': 'hmac-sha224',
+    'HMAC_SHA256': 'hmac-sha256',
+    'HMAC_SHA384': 'hmac-sha384',
+    'HMAC_SHA512': 'hmac-sha512'
+}
+
+
+class TsigKey(NamedTuple):
+    """
+    A TSIG key from dnssec-keygen private key file
+    """
+    name: str
+    algorithm: str
+    secret: str
+    file: str
+
+
+class TsigKeyReader:
+    """
+    Read dnssec-keygen private key files.
+    Parsed keys are cached by file size and modification time, a file is parsed again only when it changes.
+    The cache is kept in memory only, secrets are not written anywhere else.
+    """
+    KEY_FILE_NAME_RE = re.compile(r'^K(.+)\.\+\d{3}\+\d+\.')
+    ALGORITHM_RE = re.compile(r'^Algorithm:\s+(\d+)\s+\((.+)\)', re.MULTILINE)
+    SECRET_RE = re.compile(r'^Key:\s+(.+)$', re.MULTILINE)
+    KEY_FILE_GLOB = 'K*.private'
+
+    def __init__(self):
+        # File name as key, ((size, mtime_ns), key algorithm, key secret) as value
+        self._parsed = {}
+        self.parsed_files = 0
+
+    def read_key(self, key_file, key_name=None):
+        """
+        Read a TSIG key
+        :param key_file: dnssec-keygen private key file
+        :param key_name: Name of the key. If not set, it is taken from the file name.
+        :return: TsigKey
+        """
+        if not key_name:
+            match = TsigKeyReader.KEY_FILE_NAME_RE.search(os.path.basename(key_file))
+            if not match:
+                raise ValueError("Need TSIG key name for file %s." % key_file)
+            key_name = match.group(1)
+
+        stat = os.stat(key_file)
+        file_id = (stat.st_size, stat.st_mtime_ns)
+        parsed = self._parsed.get(key_file)
+        if not parsed or parsed[0] != file_id:
+            parsed = (file_id,) + self._parse(key_file)
+            self._parsed[key_file] = parsed
+        file_id, key_algorithm, key_secret = parsed
+
+        return TsigKey(key_name, key_algorithm, key_secret, key_file)
+
+    def read_keys(self, key_files):
+        """
+        Read multiple TSIG keys. Key names are taken from the file names.
+        :param key_files: Directory having K*.private -files, or a glob pattern for them
+        :return: list of TsigKey, sorted by key name
+        """
+        if os.path.isdir(key_files):
+            pattern = os.path.join(key_files, TsigKeyReader.KEY_FILE_GLOB)
+        else:
+            pattern = key_files
+        filenames = glob.glob(pattern)
+        if not filenames:
+            raise ValueError("No TSIG key files found from %s." % key_files)
+
+        keys = {}
+        for filename in filenames:
+            key = self.read_key(filename)
+            if key.name in keys:
+                raise ValueError("TSIG key %s is in both %s and %s." % (key.name, keys[key.name].file, filename))
+            keys[key.name] = key
+
+        return [keys[key_name] for key_name in sorted(keys)]
+
+    def _parse(self, key_file):
+        # Read given TSIG private key file and parse needed information for Bind configuration.
+        with open(key_file, encoding='utf-8') as key_handle:
+            key_data = key_handle.read()
+        self.parsed_files += 1
+
+        key_algorithm = None
+        match = TsigKeyReader.ALGORITHM_RE.search(key_data)
+        if match:
+            if match.group(2) not in TSIG_ALGORITHMS:
+                raise ValueError(
+                    "Cannot use TSIG key in file %s. Unsupported algorithm %s, need one of HMAC-SHA<bits>." % (
+                        key_file, match.group(2)))
+            key_algorithm = TSIG_ALGORITHMS[match.group(2)]
+        key_secret = None
+        match = TsigKeyReader.SECRET_RE.search(key_data)
+        if match:
+            key_secret = match.group(1).strip()
+
+        if not key_algorithm or not key_secret:
+            raise ValueError(
+                "Cannot use TSIG key in file %s. Cannot parse TSIG key-file." % (key_file))
+
+        return key_algorithm, key_secret
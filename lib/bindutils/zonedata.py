@@ -0,0 +1,198 @@
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+import os
+import re
+import json
+import mmap
+from typing import NamedTuple, Optional
+
+
+class ZoneData(NamedTuple):
+    """
+    Result of scanning a master zone file
+    """
+    file: str
+    size: int
+    mtime_ns: int
+    serial: Optional[int]
+    digest: Optional[str]
+    error: Optional[str]
+
+
+class ZoneDataScanner:
+    """
+    Scan master zone files referenced from zone-YAML: check the file exists and has a SOA-record,
+    get its serial and a digest of the content. Files are memory-mapped and scanned in parallel threads,
+    hashing and reading release the GIL.
+    Results are kept in an index file. A file having the same size and modification time as in the index
+    is not read again. Without a previous index, the first scan is the baseline and no zones are changed.
+    """
+    INDEX_FORMAT_VERSION = 1
+    DEFAULT_JOBS = 4
+    SOA_RE = re.compile(rb'(?:^|[\s)])SOA\s', re.IGNORECASE | re.MULTILINE)
+    COMMENT_RE = re.compile(rb';[^\n]*')
+    # SOA-record does not get longer than this
+    SOA_MAX_LENGTH = 4096
+
+    def __init__(self, DataDir, IndexFile=None, Jobs=DEFAULT_JOBS):
+        self.data_dir = DataDir
+        self.index_file = IndexFile
+        self.jobs = Jobs
+        # Zone name as key, ZoneData as value
+        self.previous = {}
+        self.current = {}
+        # Previous scan is known, see load_index()
+        self.has_index = False
+        if self.index_file:
+            self.load_index()
+
+    def load_index(self):
+        """
+        Load results of previous scan. A missing or broken index is ignored.
+        :return:
+        """
+        try:
+            with open(self.index_file, "r") as index_handle:
+                index = json.load(index_handle)
+            if index.get('version') != ZoneDataScanner.INDEX_FORMAT_VERSION:
+                return
+            self.previous = {zone: ZoneData(**zone_data) for zone, zone_data in index['zones'].items()}
+            self.has_index = True
+        except (OSError, ValueError, TypeError, KeyError, AttributeError):
+            self.previous = {}
+
+    def save_index(self, not_reloaded=()):
+        """
+        Save results of the scan
+        :param not_reloaded: Changed zones not reloaded, they keep their previous result to be changed on next scan
+        :return:
+        """
+        if not self.index_file:
+            return
+        zones = {}
+        for zone, zone_data in self.current.items():
+            if zone in not_reloaded:
+                zone_data = self.previous.get(zone)
+                if zone_data is None:
+                    continue
+            zones[zone] = zone_data._asdict()
+        index = {
+            'version': ZoneDataScanner.INDEX_FORMAT_VERSION,
+            'zones': zones
+        }
+        temp_filename = "%s.%d.tmp" % (self.index_file, os.getpid())
+        with open(temp_filename, "w") as index_handle:
+            json.dump(index, index_handle)
+        os.replace(temp_filename, self.index_file)
+
+    def scan(self, zones):
+        """
+        Scan zone files of given zones
+        :param zones: iterable of Zone
+        :return: dict of zone name and ZoneData
+        """
+        zone_files = [(zone.name, zone.file) for zone in zones]
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=max(1, self.jobs)) as executor:
+            results = executor.map(self._scan_zone, zone_files, chunksize=64)
+            self.current = dict(zip((zone for zone, zone_file in zone_files), results))
+
+        return self.current
+
+    def _scan_zone(self, zone_file_item):
+        zone, zone_file = zone_file_item
+        filename = os.path.join(self.data_dir, zone_file)
+        try:
+            stat = os.stat(filename)
+        except OSError as exc:
+            return ZoneData(zone_file, 0, 0, None, None, exc.strerror)
+
+        previous = self.previous.get(zone)
+        if previous and previous.file == zone_file and previous.size == stat.st_size and \
+                previous.mtime_ns == stat.st_mtime_ns:
+            return previous
+
+        import hashlib
+
+        serial = None
+        digest = None
+        error = None
+        try:
+            with open(filename, "rb") as zone_handle:
+                if stat.st_size == 0:
+                    error = "Empty zone file"
+                else:
+                    with mmap.mmap(zone_handle.fileno(), 0, access=mmap.ACCESS_READ) as zone_data:
+                        digest = hashlib.sha256(zone_data).hexdigest()
+                        serial = ZoneDataScanner.soa_serial(zone_data)
+                        if serial is None:
+                            error = "No SOA-record with a serial"
+        except (OSError, ValueError) as exc:
+            error = str(exc)
+
+        return ZoneData(zone_file, stat.st_size, stat.st_mtime_ns, serial, digest, error)
+
+    @staticmethod
+    def soa_serial(zone_data):
+        """
+        Find serial of the SOA-record
+        :param zone_data: Zone file content, bytes or mmap
+        :return: int, or None if not found
+        """
+        for match in ZoneDataScanner.SOA_RE.finditer(zone_data):
+            line_start = zone_data.rfind(b'\n', 0, match.start()) + 1
+            if b';' in zone_data[line_start:match.start()]:
+                # In a comment
+                continue
+            record = zone_data[match.end():match.end() + ZoneDataScanner.SOA_MAX_LENGTH]
+            record = ZoneDataScanner.COMMENT_RE.sub(b' ', record).replace(b'(', b' ').replace(b')', b' ')
+            # MNAME RNAME SERIAL ...
+            fields = record.split(None, 3)
+            if len(fields) >= 3 and fields[2].isdigit():
+                return int(fields[2])
+
+        return None
+
+    def errors(self):
+        return {zone: zone_data.error for zone, zone_data in self.current.items() if zone_data.error}
+
+    def changed_zones(self):
+        """
+        Zones having different content than on previous scan, new zones included
+        :return: list of zone names, empty without a previous index
+        """
+        changed = []
+        if not self.has_index:
+            return changed
+        for zone, zone_data in self.current.items():
+            previous = self.previous.get(zone)
+            if not zone_data.digest:
+                continue
+            if not previous or previous.digest != zone_data.digest:
+                changed.append(zone)
+
+        return changed
+
+    def unbumped_serials(self):
+        """
+        Zones with changed content, but serial not increased. Slaves won't notice the change.
+        :return: list of zone names
+        """
+        unbumped = []
+        for zone in self.changed_zones():
+            previous = self.previous.get(zone)
+            if not previous or previous.serial is None or self.current[zone].serial is None:
+                continue
+            # Serial number arithmetic, RFC 1982
+            if not 0 < (self.current[zone].serial - previous.serial) % 2 ** 32 < 2 ** 31:
+                unbumped.append(zone)
+
+        return unbumped
+
+    def summary(self):
+        if not self.has_index:
+            return "%d scanned, no previous index, %d errors" % (len(self.current), len(self.errors()))
+
+        return "%d scanned, %d changed, %d errors" % (len(self.current), len(self.changed_zones()),
+                                                      len(self.errors()))
@@ -0,0 +1,310 @@
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+import os
+import sys
+from ..configutils import *
+from ..bindutils import *
+
+
+def add_generation_arguments(parser):
+    """
+    Add command line options of generating files, common to all the configurators
+    :param parser: ArgumentParser to add to
+    :return:
+    """
+    parser.add_argument('--incremental', '-i', action="store_true",
+                        help='Write only new or changed files, remove files of zones no longer in the YAML')
+    parser.add_argument('--atomic', action="store_true",
+                        help='Stage all files first and move them into place at the end, main include last')
+    parser.add_argument('--jobs', '-j', metavar='N', type=int, default=1,
+                        help='Number of processes rendering and writing zone files. Default 1.')
+    parser.add_argument('--template-cache-dir', metavar='DIRECTORY',
+                        help='Directory to cache compiled templates in. Default %s.' % default_template_cache_dir())
+    parser.add_argument('--no-template-cache', action="store_true",
+                        help="Don't cache compiled templates")
+    parser.add_argument('--precompiled-templates', metavar='DIRECTORY',
+                        help='Directory of templates precompiled with: '
+                             'python3 -m lib.bindutils.compile_templates DIRECTORY')
+    parser.add_argument('--render-engine', choices=['jinja2', 'fast'], default='jinja2',
+                        help='Render simple zone templates with plain string formatting (fast) or '
+                             'always with Jinja2. Default jinja2.')
+    parser.add_argument('--render-cache', metavar='FILE',
+                        help='Keep rendered zone configurations in FILE across runs, unchanged zones are not rendered '
+                             'again.')
+    parser.add_argument('--render-cache-size', metavar='N', type=int, default=RenderCache.DEFAULT_MAX_ENTRIES,
+                        help='Maximum number of rendered zone configurations in --render-cache. Default %d.'
+                             % RenderCache.DEFAULT_MAX_ENTRIES)
+    parser.add_argument('--shards', metavar='N', type=int, default=0,
+                        help='Split zone includes into N files listed in the main include. '
+                             'Only shards having changed zones are rewritten. Default 0, no sharding.')
+    parser.add_argument('--shard-by', choices=[BindConfigWriter.SHARD_BY_HASH, BindConfigWriter.SHARD_BY_PREFIX],
+                        default=BindConfigWriter.SHARD_BY_HASH,
+                        help='Assign zones to shards by a hash of zone name or alphabetically by the '
+                             'first character of zone name. Default hash.')
+    parser.add_argument('--quiet', '-q', action="store_true",
+                        help="Don't log every file and zone, only summaries")
+    parser.add_argument('--profile', action="store_true",
+                        help='Print time spent in each stage of the run')
+
+
+def add_host_arguments(parser, rndc_help):
+    """
+    Add command line options of the master and slave configurators, generating files for a single host
+    :param parser: ArgumentParser to add to
+    :param rndc_help: Help for --rndc-reload
+    :return:
+    """
+    parser.add_argument('--bind-dir', metavar='BIND-DIRECTORY', default='/etc/bind',
+                        help='Destination directory to write to')
+    parser.add_argument('--dest-dir', '-d', metavar='DESTINATION-DIRECTORY',
+                        help='Destination directory to write to')
+    parser.add_argument('--bind-conf-file-name', metavar='BIND-ZONES-INCLUDE-CONFIG-FILE',
+                        default="zones-include.conf",
+                        help='Bind configuration file to be included for all zones.')
+    parser.add_argument('--tsig-keys', metavar='DIRECTORY-OR-GLOB',
+                        help='More TSIG private keys (K*.private) to include, eg. for zones having their own key '
+                             'in zone-YAML')
+    parser.add_argument('--rndc-reload', '-r', action="store_true", help=rndc_help)
+    parser.add_argument('--rndc-concurrency', metavar='N', type=int, default=RndcPlanner.DEFAULT_CONCURRENCY,
+                        help='Number of rndc-commands to run in parallel. Default %d.'
+                             % RndcPlanner.DEFAULT_CONCURRENCY)
+    parser.add_argument('--file-index', metavar='FILE',
+                        help='Keep size, modification time and digest of written files in FILE. Files not modified '
+                             'since are compared by digest without reading them.')
+    parser.add_argument('--dry-run', '-n', action="store_true",
+                        help="Render everything in memory and compare to the files in destination directory, "
+                             "don't write or remove anything. Lists the files that would change.")
+    parser.add_argument('--diff', action="store_true",
+                        help='Print unified diff of the files that would change. Implies --dry-run.')
+    parser.add_argument('--snapshot', action="store_true",
+                        help='Keep a compiled snapshot of zone-YAML. YAML is parsed only when it changed, and an '
+                             'incremental run writes only the zones changed since the previous run.')
+    parser.add_argument('--snapshot-file', metavar='FILE',
+                        help='Snapshot file. Default .zones-snapshot in destination directory. Implies --snapshot.')
+    parser.add_argument('--watch', '-w', action="store_true",
+                        help='Keep running and regenerate files of changed zones when the YAML-file changes. '
+                             'Implies --incremental.')
+    parser.add_argument('--watch-debounce', metavar='SECONDS', type=float, default=0.5,
+                        help='Wait for YAML-file changes to settle for this long before regenerating. Default 0.5.')
+    parser.add_argument('--watch-poll-interval', metavar='SECONDS', type=float, default=1.0,
+                        help='How often to check the YAML-file, if inotify is not available. Default 1.0.')
+    parser.add_argument('--metrics-file', metavar='FILE',
+                        help='Write metrics of the run into FILE: zone and file counts, bytes written and time spent')
+    parser.add_argument('--metrics-format', choices=METRICS_FORMATS, default='json',
+                        help='Format of --metrics-file: json or prometheus for node_exporter textfile collector. '
+                             'Default json.')
+    parser.add_argument('--profile-output', metavar='FILE',
+                        help='Profile the run with cProfile and write the statistics into FILE, '
+                             'see: python3 -m pstats FILE')
+
+
+def run(args, orig_args, regenerate):
+    """
+    Set up, regenerate once and keep regenerating in watch mode
+    :param args: Parsed command line arguments, see add_host_arguments()
+    :param orig_args: Command line as a string
+    :param regenerate: Function(args, bind_writer, timer, previous_zones, snapshot) returning (zones, success)
+    :return:
+    """
+    if args.diff:
+        args.dry_run = True
+
+    profiler = None
+    if args.profile_output:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    timer = StageTimer()
+    with timer.stage('setup'):
+        render_cache = None
+        if args.render_cache:
+            render_cache = RenderCache(CacheFile=args.render_cache, MaxEntries=args.render_cache_size)
+        file_index = None
+        if args.file_index:
+            file_index = FileDigestIndex(IndexFile=args.file_index)
+        bind_writer = BindConfigWriter(BindDir=args.bind_dir,
+                                       DestDir=args.dest_dir, MainConfFileName=args.bind_conf_file_name,
+                                       OrigArgv=orig_args, Incremental=args.incremental or args.watch or args.dry_run,
+                                       Jobs=args.jobs,
+                                       TemplateCacheDir=False if args.no_template_cache else args.template_cache_dir,
+                                       PrecompiledTemplateDir=args.precompiled_templates,
+                                       RenderEngine=args.render_engine, Atomic=args.atomic,
+                                       Shards=args.shards, ShardBy=args.shard_by, Quiet=args.quiet or args.dry_run,
+                                       RenderCache=render_cache, DryRun=args.dry_run, FileIndex=file_index)
+        snapshot = None
+        previous_zones = None
+        if args.snapshot or args.snapshot_file:
+            snapshot_file = args.snapshot_file
+            if not snapshot_file:
+                snapshot_file = os.path.join(args.dest_dir or '.', '.zones-snapshot')
+            snapshot = ZoneSnapshot(snapshot_file,
+                                    Settings=ZoneSnapshot.settings_of(args, bind_writer.template_digest()),
+                                    DestDir=args.dest_dir)
+            if bind_writer.incremental:
+                previous_zones = snapshot.previous_zones()
+        generation = renew_generation(bind_writer, args.dry_run)
+        if snapshot:
+            snapshot.generation = generation
+    zones, success = regenerate_with_metrics(args, regenerate, bind_writer, timer, previous_zones, snapshot)
+    # Files of a failed or dry run don't match the zones
+    written_zones = zones if success and not args.dry_run else None
+    if profiler:
+        profiler.disable()
+        profiler.dump_stats(args.profile_output)
+        print("Profile written to %s." % args.profile_output)
+    if args.watch:
+        def regenerate_changes():
+            nonlocal written_zones, generation
+            previous_zones = written_zones
+            if args.dest_dir and ZoneSnapshot.read_generation(args.dest_dir) != generation:
+                # Some other run has written since
+                previous_zones = None
+            # Not known until this run succeeds, also if it raises
+            written_zones = None
+            generation = renew_generation(bind_writer, args.dry_run)
+            if snapshot:
+                snapshot.generation = generation
+            zones, success = regenerate_with_metrics(args, regenerate, bind_writer, StageTimer(), previous_zones,
+                                                     snapshot)
+            if success and not args.dry_run:
+                written_zones = zones
+            return success
+
+        watch_and_regenerate(args.zone_configuration, regenerate_changes, args.watch_debounce,
+                             args.watch_poll_interval)
+    if not success:
+        sys.exit(1)
+
+    print("All done.")
+
+
+def regenerate_with_metrics(args, regenerate, bind_writer, timer, previous_zones, snapshot):
+    """
+    Regenerate and write metrics of the run, also when it raises
+    :param regenerate: Function(args, bind_writer, timer, previous_zones, snapshot) returning (zones, success)
+    :return: (zones, success) returned by regenerate
+    """
+    zones = None
+    success = False
+    try:
+        zones, success = regenerate(args, bind_writer, timer, previous_zones, snapshot)
+    finally:
+        if args.metrics_file:
+            # A failed run must not leave metrics of the previous run in place
+            durations = dict(timer.durations, render=bind_writer.render_seconds,
+                             write=bind_writer.conf_files.write_stats['write_seconds'])
+            write_metrics(args.metrics_file, collect_metrics(zones or (), bind_writer.conf_files, durations, success),
+                          args.metrics_format)
+
+    return zones, success
+
+
+def renew_generation(bind_writer, dry_run=False):
+    """
+    Give destination directory a new generation before writing into it, see ZoneSnapshot.new_generation()
+    :param bind_writer: BindConfigWriter writing into the destination directory
+    :param dry_run: Nothing is written, keep the current generation
+    :return: Generation of destination directory for this run, None without a destination directory
+    """
+    if dry_run:
+        return ZoneSnapshot.read_generation(bind_writer.destination_dir)
+    conf_files = bind_writer.conf_files
+
+    return ZoneSnapshot.new_generation(bind_writer.destination_dir, mode=ConfFileWriter.FILE_MODE,
+                                       uid=conf_files.uid, gid=conf_files.gid)
+
+
+def read_zones(args, timer, snapshot, master_ip_addr):
+    """
+    Read zones from zone-YAML, or from the snapshot if any
+    :return: ZoneSet
+    """
+    with timer.stage('parse'):
+        if snapshot:
+            zones = snapshot.read_zone_list(args.zone_configuration, master_ip_addr)
+            print("Snapshot: %s." % snapshot.summary())
+        else:
+            zones = ConfigReader.read_zone_list(args.zone_configuration, master_ip_addr)
+
+    return zones
+
+
+def changed_zones(bind_writer, zones, previous_zones):
+    """
+    Start a new run writing only zones changed since previous_zones
+    :return: only_zones for BindConfigWriter, None for all zones
+    """
+    if previous_zones is None:
+        return None
+    bind_writer.start_run()
+    only_zones = zones.changed_names(previous_zones)
+    print("Zones: %d added or changed, %d removed." % (len(only_zones), len(zones.removed_names(previous_zones))))
+
+    return only_zones
+
+
+def write_configuration(bind_writer, timer, create):
+    """
+    Create the configuration and commit it, or abort on any error
+    :param create: Function creating the configuration with bind_writer
+    :return:
+    """
+    try:
+        create()
+
+        with timer.stage('commit'):
+            bind_writer.conf_files.commit()
+    except BaseException:
+        bind_writer.conf_files.abort()
+        raise
+
+
+def finish_run(args, bind_writer, timer, zones, snapshot, scanner=None):
+    """
+    Report the changes, save caches and indexes, and reload Bind
+    :param scanner: ZoneDataScanner of zone files, if any. Zones having changed zone files are reloaded.
+    :return: False if rndc reload failed
+    """
+    data_changed_zones = ()
+    if scanner:
+        data_changed_zones = scanner.changed_zones()
+    if args.dry_run:
+        if args.diff:
+            sys.stdout.writelines(bind_writer.conf_files.diff())
+        else:
+            for filename, status in bind_writer.conf_files.changes:
+                print("Would be %s: %s" % (status, filename))
+    if bind_writer.render_cache is not None:
+        if not args.dry_run:
+            with timer.stage('cache_save'):
+                bind_writer.render_cache.save()
+        print("Render cache: %s." % bind_writer.render_cache.summary())
+    if bind_writer.file_index is not None:
+        if not args.dry_run:
+            with timer.stage('index_save'):
+                bind_writer.file_index.save()
+        print("File index: %s." % bind_writer.file_index.summary())
+    print("Files: %s." % bind_writer.conf_files.summary())
+    print("System calls: %s." % bind_writer.conf_files.syscall_summary())
+    success = True
+    not_reloaded = ()
+    if args.rndc_reload and args.dry_run:
+        for command in RndcPlanner.plan(bind_writer.conf_files, bind_writer.zone_targets, data_changed_zones):
+            print("Would run: %s %s" % (RndcPlanner.DEFAULT_RNDC, ' '.join(command)))
+    elif args.rndc_reload:
+        rndc = RndcPlanner(Concurrency=args.rndc_concurrency)
+        with timer.stage('rndc'):
+            success = rndc.reload(bind_writer.conf_files, bind_writer.zone_targets, data_changed_zones)
+        not_reloaded = rndc.not_reloaded(data_changed_zones)
+    if scanner and not args.dry_run:
+        # Changes not reloaded are tried again on next run
+        scanner.save_index(not_reloaded)
+    if snapshot and success and not args.dry_run:
+        # A failed run is not the previous run for the next one
+        with timer.stage('snapshot_save'):
+            snapshot.save(zones)
+    if args.profile:
+        print("Timing: %s, total %.3f s." % (timer.summary(), timer.total()))
+
+    return success
@@ -0,0 +1,81 @@
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+import argparse
+import sys
+from ..configutils import *
+from ..bindutils import *
+from .common import *
+
+
+def main():
+    orig_args = args_as_string()
+    parser = argparse.ArgumentParser(description='OpenDNSSEC BIND zone configurator for multiple hosts')
+    parser.add_argument('--zones-yaml', metavar='ZONES-YAML-file',
+                        help='The YAML-file containing DNS zones, if not set in inventory as zones-yaml')
+    add_generation_arguments(parser)
+    parser.add_argument('inventory', metavar='INVENTORY-YAML-file',
+                        help='The YAML-file containing Bind servers to generate configuration for')
+    args = parser.parse_args()
+
+    timer = StageTimer()
+    zones_file, hosts = ConfigReader.read_host_inventory(args.inventory)
+    if args.zones_yaml:
+        zones_file = args.zones_yaml
+    if not zones_file:
+        print("Need zone-YAML, see --zones-yaml.")
+        sys.exit(2)
+
+    # Everything shared between hosts is done only once
+    with timer.stage('setup'):
+        j2_env = create_template_environment(
+            bytecode_cache_dir=False if args.no_template_cache else args.template_cache_dir,
+            precompiled_dir=args.precompiled_templates)
+        render_cache = RenderCache(CacheFile=args.render_cache, MaxEntries=args.render_cache_size)
+        key_reader = TsigKeyReader()
+    with timer.stage('parse'):
+        zones = ConfigReader.read_zone_list(zones_file, False)
+        slave_zones = None
+        if any(host.is_slave for host in hosts):
+            slave_zones = ZoneSet(zones.slaves(), zones.views)
+            if not len(slave_zones):
+                raise ValueError("Invalid zone-YAML! No zones found from it.")
+
+    for host in hosts:
+        print("Host %s, %s into %s:" % (host.name, host.role, host.dest_dir))
+        bind_writer = BindConfigWriter(BindDir=host.bind_dir,
+                                       DestDir=host.dest_dir, MainConfFileName=host.bind_conf_file_name,
+                                       OrigArgv=orig_args, Incremental=args.incremental, Jobs=args.jobs,
+                                       TemplateCacheDir=False if args.no_template_cache else args.template_cache_dir,
+                                       PrecompiledTemplateDir=args.precompiled_templates,
+                                       RenderEngine=args.render_engine, Atomic=args.atomic,
+                                       Shards=args.shards, ShardBy=args.shard_by, Quiet=args.quiet,
+                                       TemplateEnvironment=j2_env, RenderCache=render_cache,
+                                       KeyReader=key_reader)
+        renew_generation(bind_writer)
+        try:
+            if host.is_slave:
+                bind_writer.create_slave_configuration(slave_zones, host.master_ip, timer=timer,
+                                                       key_files=host.tsig_keys, views=slave_zones.views)
+            else:
+                bind_writer.create_master_configuration(zones, host.tsig_key_file, host.tsig_key_name,
+                                                        host.signer_ip, host.tsig_out_key_file,
+                                                        host.tsig_out_key_name, timer=timer,
+                                                        key_files=host.tsig_keys, views=zones.views)
+            with timer.stage('commit'):
+                bind_writer.conf_files.commit()
+        except BaseException:
+            bind_writer.conf_files.abort()
+            raise
+        print("Host %s files: %s." % (host.name, bind_writer.conf_files.summary()))
+
+    with timer.stage('cache_save'):
+        render_cache.save()
+    print("Rendered zone files: %s." % render_cache.summary())
+    if args.profile:
+        print("Timing: %s, total %.3f s." % (timer.summary(), timer.total()))
+
+    print("All done.")
+
+
+if __name__ == '__main__':
+    main()
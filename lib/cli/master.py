@@ -0,0 +1,87 @@
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+import argparse
+import os
+from ..configutils import *
+from ..bindutils import *
+from .common import *
+
+
+def main():
+    orig_args = args_as_string()
+    parser = argparse.ArgumentParser(description='OpenDNSSEC BIND zone configurator')
+    add_generation_arguments(parser)
+    parser.add_argument('zone_configuration', metavar='ZONES-YAML-file',
+                        help='The YAML-file containing DNS zones')
+    parser.add_argument('tsig_key_file', metavar='TSIG-IN-PRIVATE-KEY-FILE',
+                        help='TSIG private key to access OpenDNSSEC signerd for signed zones')
+    parser.add_argument('--tsig-key-name', metavar='TSIG-IN-KEY-NAME',
+                        help='TSIG key name for reading signed zones from OpenDNSSEC signerd')
+    parser.add_argument('--signer-ip', metavar='SIGNERD-IP', default="::1",
+                        help='OpenDNSSEC signerd IP-address')
+    parser.add_argument('--signer-port', metavar='SIGNERD-PORT', default="53",
+                        help='OpenDNSSEC signerd port. Default AXFR from TCP/53.')
+    parser.add_argument('--tsig-out-key-file', metavar='TSIG-OUT-PRIVATE-KEY-FILE',
+                        help='TSIG private key to allow access for OpenDNSSEC signerd into this DNS')
+    parser.add_argument('--tsig-out-key-name', metavar='TSIG-OUT-KEY-NAME', default='opendnssec-out',
+                        help='TSIG key name for OpenDNSSEC signerd to read unsigned zones from this DNS')
+    parser.add_argument('--zone-data-dir', metavar='DIRECTORY',
+                        help='Directory of master zone files. If set, zone files are checked and Bind is reloaded '
+                             'for zones having changed data.')
+    parser.add_argument('--zone-data-index', metavar='FILE',
+                        help='Index of zone file serials and digests from previous run. '
+                             'Default .zone-data-index.json in destination directory.')
+    parser.add_argument('--zone-data-strict', action="store_true",
+                        help="Don't write anything, if a zone file is missing or has no SOA-record")
+    parser.add_argument('--catalog-zone', metavar='ZONE',
+                        help='Write RFC 9432 catalog zone ZONE having all the slave zones as members into '
+                             '--zone-data-dir. ZONE must be a regular zone having slave: true in zone-YAML.')
+    add_host_arguments(parser, 'After all is done ok, run rndc reconfig/reload/retransfer for changes to update Bind')
+    args = parser.parse_args()
+    if args.catalog_zone and not args.zone_data_dir:
+        parser.error('--catalog-zone needs --zone-data-dir')
+
+    run(args, orig_args, regenerate)
+
+
+def regenerate(args, bind_writer, timer, previous_zones=None, snapshot=None):
+    """
+    Read zones and write Bind configuration for them
+    :param args: Parsed command line arguments
+    :param bind_writer: BindConfigWriter to write with
+    :param timer: StageTimer to record time spent in stages into
+    :param previous_zones: ZoneSet written on previous run. If set, only files of added or changed zones are written.
+    :param snapshot: ZoneSnapshot to read zones from and save them into, if any
+    :return: (ZoneSet of zones read, False if rndc reload failed)
+    """
+    zones = read_zones(args, timer, snapshot, False)
+    scanner = None
+    if args.zone_data_dir:
+        index_file = args.zone_data_index
+        if not index_file:
+            index_file = os.path.join(args.dest_dir or '.', '.zone-data-index.json')
+        with timer.stage('zone_data'):
+            scanner = ZoneDataScanner(args.zone_data_dir, IndexFile=index_file)
+            # DNSSEC-zones are masters here only when serving them to OpenDNSSEC signerd
+            # Catalog zone is written by us, it is reloaded when written
+            scanner.scan(zone for zone in zones if (args.tsig_out_key_file or not zone.dnssec) and
+                         zone.name != args.catalog_zone)
+        errors = scanner.errors()
+        for zone in errors:
+            print("Zone data of %s: %s" % (zone, errors[zone]))
+        for zone in scanner.unbumped_serials():
+            print("Zone data of %s changed, but serial was not increased." % zone)
+        print("Zone data: %s." % scanner.summary())
+        if errors and args.zone_data_strict:
+            raise ValueError("Zone data of %d zones has errors, nothing written." % len(errors))
+    only_zones = changed_zones(bind_writer, zones, previous_zones)
+    write_configuration(bind_writer, timer, lambda: bind_writer.create_master_configuration(
+        zones, args.tsig_key_file, args.tsig_key_name, args.signer_ip, args.tsig_out_key_file, args.tsig_out_key_name,
+        timer=timer, only_zones=only_zones, key_files=args.tsig_keys, views=zones.views,
+        catalog_zone=args.catalog_zone, catalog_dir=args.zone_data_dir))
+
+    return zones, finish_run(args, bind_writer, timer, zones, snapshot, scanner)
+
+
+if __name__ == '__main__':
+    main()
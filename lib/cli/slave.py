@@ -0,0 +1,47 @@
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+import argparse
+from ..configutils import *
+from ..bindutils import *
+from .common import *
+
+
+def main():
+    orig_args = args_as_string()
+    parser = argparse.ArgumentParser(description='OpenDNSSEC BIND slave zone configurator')
+    add_generation_arguments(parser)
+    parser.add_argument('--catalog-zone', metavar='ZONE',
+                        help='Configure only catalog zone ZONE of zone-YAML, Bind provisions the member zones from '
+                             'it. Writes %s to be included into options of named.conf.'
+                             % BindConfigWriter.DEFAULT_BIND_CATALOG_ZONES_CONF_FILENAME)
+    parser.add_argument('zone_configuration', metavar='ZONES-YAML-file',
+                        help='The YAML-file containing DNS zones')
+    parser.add_argument('master_ip', metavar='DNS-MASTER-IP',
+                        help='IP-address of the master DNS of this slave DNS')
+    add_host_arguments(parser, 'After all is done ok, run rndc reconfig/retransfer for changes to update Bind')
+    args = parser.parse_args()
+
+    run(args, orig_args, regenerate)
+
+
+def regenerate(args, bind_writer, timer, previous_zones=None, snapshot=None):
+    """
+    Read slave zones and write Bind configuration for them
+    :param args: Parsed command line arguments
+    :param bind_writer: BindConfigWriter to write with
+    :param timer: StageTimer to record time spent in stages into
+    :param previous_zones: ZoneSet written on previous run. If set, only files of added or changed zones are written.
+    :param snapshot: ZoneSnapshot to read zones from and save them into, if any
+    :return: (ZoneSet of zones read, False if rndc reload failed)
+    """
+    zones = read_zones(args, timer, snapshot, args.master_ip)
+    only_zones = changed_zones(bind_writer, zones, previous_zones)
+    write_configuration(bind_writer, timer, lambda: bind_writer.create_slave_configuration(
+        zones, args.master_ip, timer=timer, only_zones=only_zones, key_files=args.tsig_keys, views=zones.views,
+        catalog_zone=args.catalog_zone))
+
+    return zones, finish_run(args, bind_writer, timer, zones, snapshot)
+
+
+if __name__ == '__main__':
+    main()
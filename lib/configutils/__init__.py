@@ -1,2 +1,7 @@
 from .reader import *
-from .argv_helper import *
\ No newline at end of file
+from .zones import *
+from .hosts import *
+from .argv_helper import *
+from .watcher import *
+from .timing import *
+from .snapshot import *
\ No newline at end of file
@@ -0,0 +1,31 @@
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+from typing import NamedTuple, Optional
+
+
+class Host(NamedTuple):
+    """
+    A Bind server from host inventory YAML
+    """
+    name: str
+    role: str
+    dest_dir: str
+    bind_dir: str = '/etc/bind'
+    bind_conf_file_name: str = 'zones-include.conf'
+    # Directory or glob of more TSIG keys
+    tsig_keys: Optional[str] = None
+    # Slave only
+    master_ip: Optional[str] = None
+    # Master only
+    tsig_key_file: Optional[str] = None
+    tsig_key_name: Optional[str] = None
+    signer_ip: str = '::1'
+    tsig_out_key_file: Optional[str] = None
+    tsig_out_key_name: str = 'opendnssec-out'
+
+    MASTER = 'master'
+    SLAVE = 'slave'
+
+    @property
+    def is_slave(self):
+        return self.role == Host.SLAVE
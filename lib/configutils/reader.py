@@ -1,51 +1,382 @@
-# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
-
-import yaml
-
-
-class ConfigReader:
-
-    @staticmethod
-    def read_zone_list(configuration_file_name, master_ip_addr):
-        zones = {}
-        with open(configuration_file_name, "r") as stream:
-            zone_config = yaml.safe_load(stream)
-        if not zone_config['zones']:
-            raise ValueError("Invalid zone-YAML! No 'zones' in it.")
-        zone_config = zone_config['zones']
-        zone_count = 0
-
-        if 'dnssec' in zone_config:
-            for zone_item in zone_config['dnssec']:
-                zone_name = next(iter(zone_item))
-                zone_file = zone_item[zone_name]
-                zone_does_slave = False
-                if not isinstance(zone_file, str):
-                    if 'slave' in zone_file and isinstance(zone_file['slave'], bool):
-                        zone_does_slave = zone_file['slave']
-                    zone_file = zone_file['file']
-                if master_ip_addr and not zone_does_slave:
-                    # Skip non-slave zones on a slave DNS
-                    continue
-                zones[zone_name] = [True, zone_file]
-                zone_count += 1
-
-        if 'regular' in zone_config:
-            for zone_item in zone_config['regular']:
-                zone_name = next(iter(zone_item))
-                zone_file = zone_item[zone_name]
-                zone_does_slave = False
-                if not isinstance(zone_file, str):
-                    if 'slave' in zone_file and isinstance(zone_file['slave'], bool):
-                        zone_does_slave = zone_file['slave']
-                    zone_file = zone_file['file']
-                if master_ip_addr and not zone_does_slave:
-                    # Skip non-slave zones on a slave DNS
-                    continue
-                zones[zone_name] = [False, zone_file]
-                zone_count += 1
-
-        if zone_count == 0:
-            raise ValueError("Invalid zone-YAML! No zones found from it.")
-
-        return zones
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+import copy
+import re
+from .zones import Zone, ZoneSet, View
+from .hosts import Host
+
+# PyYAML is imported on first use, see _import_yaml()
+yaml = None
+SafeLoader = None
+
+
+def _import_yaml():
+    """
+    Import PyYAML. Not done at import time, running eg. --help doesn't need it.
+    :return:
+    """
+    global yaml, SafeLoader
+    if yaml is not None:
+        return
+    try:
+        # Use libyaml, if available
+        from yaml import CSafeLoader as SafeLoader
+    except ImportError:
+        from yaml import SafeLoader
+    import yaml
+
+
+class ConfigReader:
+    # View names are used in file names
+    VIEW_NAME_RE = re.compile(r'^[A-Za-z0-9_][A-Za-z0-9_.-]*$')
+    # Built-in ACLs of Bind, every view gets an ACL of its name. Generated views unsigned and default.
+    RESERVED_VIEW_NAMES = ('any', 'none', 'localhost', 'localnets', 'unsigned', 'default')
+    VIEW_KEYS = ('name', 'match-clients', 'zones')
+
+    @staticmethod
+    def read_zone_list(configuration_file_name, master_ip_addr):
+        views = []
+        zones = ZoneSet(ConfigReader.iter_zone_list(configuration_file_name, master_ip_addr, views=views))
+        zones.views = views
+        if views:
+            owners = zones.view_owners()
+            for zone in zones:
+                if zone.name not in owners:
+                    raise ValueError("Invalid zone-YAML! Zone %s is not in any view." % zone.name)
+            if not master_ip_addr:
+                # Slaves don't have all the zones
+                for view in views:
+                    for zone_name in view.zones or ():
+                        if zone_name not in zones:
+                            raise ValueError("Invalid zone-YAML! Unknown zone %s in view %s." % (
+                                zone_name, view.name))
+
+        return zones
+
+    @staticmethod
+    def iter_zone_list(configuration_file_name, master_ip_addr, views=None):
+        """
+        Read zones from zone-YAML one at a time without loading the entire document into memory.
+        DNSSEC-zones are produced first, then regular zones, same as read_zone_list() does.
+        :param configuration_file_name: The YAML-file containing DNS zones
+        :param master_ip_addr: If set, reading for a slave DNS. Only zones having slave: true are produced.
+        :param views: If set, list to append views of the zone-YAML to, after all zones are produced
+        :return: generator of Zone
+        """
+        zone_count = 0
+        with open(configuration_file_name, "r") as stream:
+            zone_item_reader = _ZoneItemReader(stream)
+            for is_dnssec, zone_item in zone_item_reader:
+                zone_name = next(iter(zone_item))
+                zone_file = zone_item[zone_name]
+                zone_does_slave = False
+                zone_key = None
+                if not isinstance(zone_file, str):
+                    if 'slave' in zone_file and isinstance(zone_file['slave'], bool):
+                        zone_does_slave = zone_file['slave']
+                    if 'key' in zone_file:
+                        zone_key = zone_file['key']
+                        if is_dnssec:
+                            # Transfers of signed zones are done by OpenDNSSEC signerd keys
+                            raise ValueError("Invalid zone-YAML! DNSSEC-zone %s can't have a key." % zone_name)
+                    zone_file = zone_file['file']
+                if master_ip_addr and not zone_does_slave:
+                    # Skip non-slave zones on a slave DNS
+                    continue
+                zone_count += 1
+                yield Zone(zone_name, is_dnssec, zone_file, zone_does_slave, zone_key)
+
+        if zone_count == 0:
+            raise ValueError("Invalid zone-YAML! No zones found from it.")
+        if views is not None and zone_item_reader.views is not None:
+            views.extend(ConfigReader._parse_views(zone_item_reader.views))
+
+    @staticmethod
+    def _parse_views(view_items):
+        """
+        Check views of zone-YAML
+        :param view_items: Value of views in zone-YAML
+        :return: list of View
+        """
+        if not isinstance(view_items, list):
+            raise ValueError("Invalid zone-YAML! Views is not a list.")
+        views = []
+        view_names = set()
+        for view_item in view_items:
+            if not isinstance(view_item, dict):
+                raise ValueError("Invalid zone-YAML! View %s is not a mapping." % view_item)
+            for key in view_item:
+                if key not in ConfigReader.VIEW_KEYS:
+                    raise ValueError("Invalid zone-YAML! Unknown key %s in view %s." % (key, view_item.get('name')))
+            view_name = view_item.get('name')
+            if not isinstance(view_name, str) or not ConfigReader.VIEW_NAME_RE.match(view_name):
+                raise ValueError("Invalid zone-YAML! Invalid view name %s." % view_name)
+            if view_name.lower() in ConfigReader.RESERVED_VIEW_NAMES:
+                raise ValueError("Invalid zone-YAML! View name %s is reserved." % view_name)
+            if view_name in view_names:
+                raise ValueError("Invalid zone-YAML! View %s defined twice." % view_name)
+            view_names.add(view_name)
+            match_clients = view_item.get('match-clients')
+            if not isinstance(match_clients, list) or not match_clients or \
+                    not all(isinstance(client, str) for client in match_clients):
+                raise ValueError("Invalid zone-YAML! View %s needs match-clients list." % view_name)
+            view_zones = view_item.get('zones')
+            if view_zones is not None:
+                if not isinstance(view_zones, list) or not all(isinstance(zone, str) for zone in view_zones):
+                    raise ValueError("Invalid zone-YAML! Zones of view %s is not a list of zone names." % view_name)
+                view_zones = frozenset(view_zones)
+            views.append(View(view_name, tuple(match_clients), view_zones))
+
+        return views
+
+    @staticmethod
+    def read_host_inventory(inventory_file_name):
+        """
+        Read Bind servers to generate configuration for.
+        Keys of a host are the command line options of the configurators, eg. dest-dir or master-ip.
+        :param inventory_file_name: The YAML-file containing hosts
+        :return: (zone-YAML file name if given in inventory, list of Host)
+        """
+        _import_yaml()
+        with open(inventory_file_name, "r") as stream:
+            inventory = yaml.load(stream, Loader=SafeLoader)
+        if not isinstance(inventory, dict) or not isinstance(inventory.get('hosts'), list) or \
+                not inventory['hosts']:
+            raise ValueError("Invalid inventory-YAML! No 'hosts' in it.")
+
+        hosts = []
+        for host_item in inventory['hosts']:
+            if not isinstance(host_item, dict):
+                raise ValueError("Invalid inventory-YAML! Host %s is not a mapping." % host_item)
+            host_args = {}
+            for key, value in host_item.items():
+                field = str(key).replace('-', '_')
+                if field not in Host._fields:
+                    raise ValueError("Invalid inventory-YAML! Unknown key %s in host %s." % (
+                        key, host_item.get('name')))
+                host_args[field] = value
+            for field in ('name', 'role', 'dest_dir'):
+                if not host_args.get(field):
+                    raise ValueError("Invalid inventory-YAML! Host %s has no %s." % (
+                        host_item.get('name'), field.replace('_', '-')))
+            host = Host(**host_args)
+            if host.role == Host.SLAVE:
+                if not host.master_ip:
+                    raise ValueError("Invalid inventory-YAML! Slave host %s has no master-ip." % host.name)
+            elif host.role == Host.MASTER:
+                if not host.tsig_key_file:
+                    raise ValueError("Invalid inventory-YAML! Master host %s has no tsig-key-file." % host.name)
+            else:
+                raise ValueError("Invalid inventory-YAML! Host %s has unknown role %s." % (host.name, host.role))
+            hosts.append(host)
+
+        return inventory.get('zones-yaml'), hosts
+
+
+class _ZoneItemReader:
+    """
+    Pull zone items out of a zone-YAML one at a time using parser events.
+    Only zones.dnssec and zones.regular -sequences and views are constructed, rest of the document is skipped.
+    Items with plain strings and booleans are constructed directly from the events,
+    anything more complex is passed to a regular YAML-loader. Anchored nodes are kept for aliases
+    in later items, eg. merge keys of defaults defined elsewhere in the document.
+    Regular zones listed before DNSSEC-zones are kept in memory until DNSSEC-zones are read. If there are
+    more than REGULAR_BUFFER_SIZE of them, they are read in a second pass over the file instead.
+    """
+    STR_TAG = 'tag:yaml.org,2002:str'
+    BOOL_TAG = 'tag:yaml.org,2002:bool'
+    REGULAR_BUFFER_SIZE = 10000
+
+    class _NotSimple(Exception):
+        pass
+
+    def __init__(self, stream, Sections=('dnssec', 'regular')):
+        _import_yaml()
+        self.stream = stream
+        self.sections = Sections
+        self.loader = SafeLoader(stream)
+        # Value of views, if any
+        self.views = None
+        # Anchor as key, events of the anchored node without anchors as value
+        self._anchors = {}
+        self._reread_regular = False
+
+    def __iter__(self):
+        loader = self.loader
+        try:
+            loader.get_event()
+            if not loader.check_event(yaml.DocumentStartEvent):
+                raise ValueError("Invalid zone-YAML! No 'zones' in it.")
+            loader.get_event()
+            if not loader.check_event(yaml.MappingStartEvent):
+                raise ValueError("Invalid zone-YAML! No 'zones' in it.")
+            loader.get_event()
+
+            zones_found = False
+            while not loader.check_event(yaml.MappingEndEvent):
+                key = self._construct(self._read_node_events())
+                if key == 'zones':
+                    zones_found = True
+                    yield from self._read_zones()
+                elif key == 'views':
+                    self.views = self._construct(self._read_node_events())
+                else:
+                    self._skip_node()
+            if not zones_found:
+                raise ValueError("Invalid zone-YAML! No 'zones' in it.")
+        finally:
+            loader.dispose()
+
+        if self._reread_regular:
+            self.stream.seek(0)
+            yield from _ZoneItemReader(self.stream, Sections=('regular',))
+
+    def _read_zones(self):
+        loader = self.loader
+        if not loader.check_event(yaml.MappingStartEvent):
+            self._skip_node()
+            raise ValueError("Invalid zone-YAML! No 'zones' in it.")
+        loader.get_event()
+
+        # Regular zones listed before DNSSEC zones need to wait for them
+        dnssec_done = 'dnssec' not in self.sections
+        regular_items = []
+        if loader.check_event(yaml.MappingEndEvent):
+            raise ValueError("Invalid zone-YAML! No 'zones' in it.")
+        while not loader.check_event(yaml.MappingEndEvent):
+            key = self._construct(self._read_node_events())
+            if key not in ('dnssec', 'regular') or not loader.check_event(yaml.SequenceStartEvent):
+                self._skip_node()
+                continue
+            loader.get_event()
+            while not loader.check_event(yaml.SequenceEndEvent):
+                if key not in self.sections or self._reread_regular and key == 'regular':
+                    self._skip_node()
+                    continue
+                zone_item = self._construct(self._read_node_events())
+                if key == 'dnssec':
+                    yield True, zone_item
+                elif dnssec_done:
+                    yield False, zone_item
+                elif len(regular_items) < _ZoneItemReader.REGULAR_BUFFER_SIZE or not self.stream.seekable():
+                    regular_items.append(zone_item)
+                else:
+                    # Too many to keep in memory, read them again after DNSSEC-zones
+                    self._reread_regular = True
+                    regular_items = []
+            loader.get_event()
+            if key == 'dnssec':
+                dnssec_done = True
+        loader.get_event()
+
+        for zone_item in regular_items:
+            yield False, zone_item
+
+    def _read_node_events(self):
+        event = self.loader.get_event()
+        events = [event]
+        has_anchors = event.anchor is not None
+        if isinstance(event, yaml.CollectionStartEvent):
+            depth = 1
+            while depth:
+                event = self.loader.get_event()
+                if isinstance(event, yaml.CollectionStartEvent):
+                    depth += 1
+                    if event.anchor is not None:
+                        has_anchors = True
+                elif isinstance(event, yaml.CollectionEndEvent):
+                    depth -= 1
+                elif event.anchor is not None:
+                    has_anchors = True
+                events.append(event)
+        if has_anchors:
+            events = self._resolve_anchors(events)
+
+        return events
+
+    def _resolve_anchors(self, events):
+        """
+        Replace aliases with the nodes they refer to, and keep anchored nodes for later aliases
+        :param events: Events of a node
+        :return: Events of the node, having no aliases to previously anchored nodes
+        """
+        resolved = []
+        # (anchor, index in resolved) of open collections
+        collections = []
+        for event in events:
+            if isinstance(event, yaml.AliasEvent):
+                # Unknown ones are left to the YAML-loader to complain about
+                resolved.extend(self._anchors.get(event.anchor, [event]))
+                continue
+            resolved.append(event)
+            if isinstance(event, yaml.CollectionStartEvent):
+                collections.append((event.anchor, len(resolved) - 1))
+            elif isinstance(event, yaml.CollectionEndEvent):
+                anchor, start_idx = collections.pop()
+                if anchor is not None:
+                    self._anchors[anchor] = self._without_anchors(resolved[start_idx:])
+            elif event.anchor is not None:
+                self._anchors[event.anchor] = self._without_anchors([event])
+
+        return resolved
+
+    @staticmethod
+    def _without_anchors(events):
+        # An anchor can be defined only once in a document
+        unanchored = []
+        for event in events:
+            if getattr(event, 'anchor', None) is not None:
+                event = copy.copy(event)
+                event.anchor = None
+            unanchored.append(event)
+
+        return unanchored
+
+    def _skip_node(self):
+        if not self.loader.check_event(yaml.CollectionStartEvent) or self.loader.peek_event().anchor is not None:
+            # Anchors are needed, if referred to later
+            self._read_node_events()
+            return
+        self.loader.get_event()
+        while not self.loader.check_event(yaml.CollectionEndEvent):
+            self._skip_node()
+        self.loader.get_event()
+
+    def _construct(self, events):
+        try:
+            value, next_idx = self._construct_simple(events, 0)
+            return value
+        except _ZoneItemReader._NotSimple:
+            pass
+
+        # Let YAML-loader do the job for anything not simple
+        document_events = [yaml.StreamStartEvent(), yaml.DocumentStartEvent()] + events + \
+                          [yaml.DocumentEndEvent(), yaml.StreamEndEvent()]
+        return yaml.load(yaml.emit(document_events), Loader=SafeLoader)
+
+    def _construct_simple(self, events, idx):
+        event = events[idx]
+        if event.anchor is not None:
+            raise _ZoneItemReader._NotSimple()
+        if isinstance(event, yaml.ScalarEvent):
+            if event.tag is not None and event.tag != '!':
+                raise _ZoneItemReader._NotSimple()
+            if not event.implicit[0]:
+                # Quoted
+                return event.value, idx + 1
+            tag = self.loader.resolve(yaml.ScalarNode, event.value, (True, False))
+            if tag == _ZoneItemReader.STR_TAG:
+                return event.value, idx + 1
+            if tag == _ZoneItemReader.BOOL_TAG:
+                return self.loader.bool_values[event.value.lower()], idx + 1
+            raise _ZoneItemReader._NotSimple()
+        if isinstance(event, yaml.MappingStartEvent) and event.tag is None:
+            mapping = {}
+            idx += 1
+            while not isinstance(events[idx], yaml.MappingEndEvent):
+                key, idx = self._construct_simple(events, idx)
+                value, idx = self._construct_simple(events, idx)
+                mapping[key] = value
+            return mapping, idx + 1
+
+        raise _ZoneItemReader._NotSimple()
@@ -0,0 +1,193 @@
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+import os
+import marshal
+from .reader import ConfigReader
+from .zones import Zone, ZoneSet, View
+
+
+class ZoneSnapshot:
+    """
+    Compiled snapshot of zone-YAML: zones and views read from it, and the size, modification time and
+    digest of the YAML-file. YAML is parsed again only when the file changed, loading the snapshot is
+    much faster than parsing.
+    A snapshot is saved after a successful run. The zones in it were written by that run, an incremental
+    run with the same command line and templates needs to write only the zones changed since.
+    Every run writing into a destination directory gives it a new generation, see new_generation().
+    Zones of a snapshot are used only if no other run has written into the directory since.
+    """
+    FORMAT_VERSION = 2
+    GENERATION_FILENAME = '.zones-generation'
+    # Command line options not affecting the written files
+    RUN_OPTIONS = ('incremental', 'atomic', 'jobs', 'template_cache_dir', 'no_template_cache', 'render_engine',
+                   'rndc_reload', 'rndc_concurrency', 'render_cache', 'render_cache_size', 'file_index', 'dry_run',
+                   'diff', 'watch', 'watch_debounce', 'watch_poll_interval', 'quiet', 'metrics_file', 'metrics_format',
+                   'profile', 'profile_output', 'snapshot', 'snapshot_file', 'zone_data_index', 'zone_data_strict')
+
+    def __init__(self, SnapshotFile, Settings=None, DestDir=None):
+        """
+        :param SnapshotFile: File to keep the snapshot in
+        :param Settings: Anything else affecting the written files, see settings_of().
+        None for never using zones of previous run.
+        :param DestDir: Destination directory the zones are written into
+        """
+        self.snapshot_file = SnapshotFile
+        self.settings = Settings
+        self.dest_dir = DestDir
+        # Generation of destination directory written by this run, see new_generation()
+        self.generation = None
+        # (zone-YAML file name, master IP-address, size, mtime_ns, digest) of the snapshot
+        self._source = None
+        # Same of the zone-YAML read by read_zone_list(), becomes the source of the snapshot on save()
+        self._read_source = None
+        self._settings = None
+        self._generation = None
+        self._zones = None
+        # How zone-YAML was read by read_zone_list(): snapshot, digest or parsed
+        self.read_from = None
+        self.load()
+
+    @staticmethod
+    def settings_of(args, template_digest):
+        """
+        Get settings of a run for comparing with previous run
+        :param args: Parsed command line arguments
+        :param template_digest: Digest of templates, see BindConfigWriter.template_digest()
+        :return: Settings, or None if templates are not known
+        """
+        if not template_digest:
+            return None
+
+        return template_digest, sorted((name, value) for name, value in vars(args).items()
+                                       if name not in ZoneSnapshot.RUN_OPTIONS)
+
+    def load(self):
+        """
+        Load snapshot file. A missing, broken or old format snapshot is ignored.
+        :return:
+        """
+        try:
+            with open(self.snapshot_file, "rb") as snapshot_handle:
+                # Much faster than marshal.load(), which reads the file in small pieces
+                format_version, source, settings, generation, zones, views = marshal.loads(snapshot_handle.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return
+        if format_version != ZoneSnapshot.FORMAT_VERSION:
+            return
+        self._source = source
+        self._settings = settings
+        self._generation = generation
+        self._zones = ZoneSet((Zone._make(zone) for zone in zones), (View._make(view) for view in views))
+
+    def save(self, zones):
+        """
+        Write snapshot file of zones written by a successful run
+        :param zones: ZoneSet returned by read_zone_list()
+        :return:
+        """
+        if self._read_source is None:
+            return
+        snapshot_dir = os.path.dirname(self.snapshot_file)
+        if snapshot_dir:
+            os.makedirs(snapshot_dir, 0o700, exist_ok=True)
+        temp_filename = "%s.%d.tmp" % (self.snapshot_file, os.getpid())
+        with open(temp_filename, "wb") as snapshot_handle:
+            marshal.dump((ZoneSnapshot.FORMAT_VERSION, self._read_source, self.settings, self.generation,
+                          [tuple(zone) for zone in zones], [tuple(view) for view in zones.views]),
+                         snapshot_handle)
+        os.replace(temp_filename, self.snapshot_file)
+        # Source and zones always go together, zones of a failed run are never served from snapshot
+        self._source = self._read_source
+        self._settings = self.settings
+        self._generation = self.generation
+        self._zones = zones
+
+    def previous_zones(self):
+        """
+        Zones written by the run saving the snapshot, if it had the same settings and
+        was the latest run writing into destination directory
+        :return: ZoneSet, or None if not known
+        """
+        if self.settings is None or self._settings != self.settings:
+            return None
+        if self._generation is None or self._generation != ZoneSnapshot.read_generation(self.dest_dir):
+            # Written by some other run since, files don't match the snapshot
+            return None
+
+        return self._zones
+
+    @staticmethod
+    def read_generation(dest_dir):
+        """
+        Get generation of a destination directory
+        :param dest_dir: Destination directory
+        :return: Generation, or None if not known
+        """
+        if not dest_dir:
+            return None
+        try:
+            with open('%s/%s' % (dest_dir, ZoneSnapshot.GENERATION_FILENAME), "r") as generation_handle:
+                return generation_handle.read().strip() or None
+        except OSError:
+            return None
+
+    @staticmethod
+    def new_generation(dest_dir, mode=0o640, uid=None, gid=None):
+        """
+        Give a destination directory a new generation. Done by every run before writing into it.
+        :param dest_dir: Destination directory. Without one, there is no generation.
+        :param mode: Mode of the generation file
+        :param uid: Owner of the generation file, None for not changing ownership
+        :param gid: Group of the generation file
+        :return: New generation, or None if not known
+        """
+        if not dest_dir:
+            return None
+        generation = os.urandom(16).hex()
+        generation_file = '%s/%s' % (dest_dir, ZoneSnapshot.GENERATION_FILENAME)
+        temp_filename = "%s.%d.tmp" % (generation_file, os.getpid())
+        try:
+            fd = os.open(temp_filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+        except FileNotFoundError:
+            return None
+        try:
+            os.fchmod(fd, mode)
+            if uid is not None:
+                os.fchown(fd, uid, gid)
+            os.write(fd, ("%s\n" % generation).encode('ascii'))
+        finally:
+            os.close(fd)
+        os.replace(temp_filename, generation_file)
+
+        return generation
+
+    def read_zone_list(self, configuration_file_name, master_ip_addr):
+        """
+        Read zones from zone-YAML, or from the snapshot if the YAML-file has not changed.
+        See ConfigReader.read_zone_list().
+        """
+        import hashlib
+
+        stat = os.stat(configuration_file_name)
+        source = self._source
+        if self._zones is not None and source[:4] == (configuration_file_name, master_ip_addr,
+                                                      stat.st_size, stat.st_mtime_ns):
+            self.read_from = 'snapshot'
+            self._read_source = source
+            return self._zones
+
+        with open(configuration_file_name, "rb") as yaml_handle:
+            digest = hashlib.sha256(yaml_handle.read()).digest()
+        self._read_source = (configuration_file_name, master_ip_addr, stat.st_size, stat.st_mtime_ns, digest)
+        if self._zones is not None and source[:2] == (configuration_file_name, master_ip_addr) and \
+                source[4] == digest:
+            # Touched, but not changed
+            self.read_from = 'digest'
+            return self._zones
+
+        self.read_from = 'parsed'
+        return ConfigReader.read_zone_list(configuration_file_name, master_ip_addr)
+
+    def summary(self):
+        return "zone-YAML %s" % {'snapshot': 'not changed', 'digest': 'not changed, only touched',
+                                 'parsed': 'parsed'}.get(self.read_from, 'not read')
@@ -0,0 +1,32 @@
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+import time
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """
+    Wall clock time spent in named stages of a run.
+    Time of a stage entered multiple times is summed up.
+    """
+
+    def __init__(self):
+        # Stage name as key, in order of first use
+        self.durations = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def total(self):
+        return sum(self.durations.values())
+
+    def summary(self):
+        return ', '.join("%s %.3f s" % (name, seconds) for name, seconds in self.durations.items())
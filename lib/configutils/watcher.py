@@ -0,0 +1,199 @@
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+import os
+import select
+import struct
+import time
+
+
+class FileWatcher:
+    """
+    Wait for a file to change.
+    On Linux inotify is used for watching the directory of the file, so that editors replacing the file
+    are noticed too. Elsewhere, or if inotify is not available, the file is polled.
+    """
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_NONBLOCK = 0x00000800
+    IN_CLOEXEC = 0x00080000
+    EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self, filename, Debounce=0.5, PollInterval=1.0):
+        self.filename = os.path.abspath(filename)
+        self.debounce = Debounce
+        self.poll_interval = PollInterval
+        self._inotify_fd = None
+        self._last_stat = self._stat()
+        self._polled_stat = self._last_stat
+        self._init_inotify()
+
+    def _init_inotify(self):
+        # ctypes is slow to import, needed only when watching
+        import ctypes
+        import ctypes.util
+
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name:
+            return
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            return
+        fd = libc.inotify_init1(FileWatcher.IN_NONBLOCK | FileWatcher.IN_CLOEXEC)
+        if fd < 0:
+            return
+        mask = FileWatcher.IN_MODIFY | FileWatcher.IN_CLOSE_WRITE | FileWatcher.IN_MOVED_TO | \
+               FileWatcher.IN_CREATE | FileWatcher.IN_DELETE
+        wd = libc.inotify_add_watch(fd, os.fsencode(os.path.dirname(self.filename)), mask)
+        if wd < 0:
+            os.close(fd)
+            return
+        self._inotify_fd = fd
+
+    @property
+    def method(self):
+        return 'inotify' if self._inotify_fd is not None else 'polling'
+
+    def close(self):
+        if self._inotify_fd is not None:
+            os.close(self._inotify_fd)
+            self._inotify_fd = None
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.filename)
+        except FileNotFoundError:
+            return None
+
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def _read_inotify_events(self):
+        """
+        Read pending inotify events
+        :return: True if any of them was about the watched file
+        """
+        basename = os.fsencode(os.path.basename(self.filename))
+        matched = False
+        while True:
+            try:
+                data = os.read(self._inotify_fd, 65536)
+            except BlockingIOError:
+                break
+            pos = 0
+            while pos < len(data):
+                wd, mask, cookie, name_len = FileWatcher.EVENT_HEADER.unpack_from(data, pos)
+                pos += FileWatcher.EVENT_HEADER.size
+                name = data[pos:pos + name_len].rstrip(b'\0')
+                pos += name_len
+                if name == basename:
+                    matched = True
+
+        return matched
+
+    def _wait_for_event(self, timeout):
+        """
+        Wait for something to happen to the file
+        :param timeout: Seconds to wait, None for no limit
+        :return: True if the file was changed
+        """
+        if self._inotify_fd is not None:
+            readable, writable, exceptional = select.select([self._inotify_fd], [], [], timeout)
+            if not readable:
+                return False
+            return self._read_inotify_events()
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            stat = self._stat()
+            if stat != self._polled_stat:
+                self._polled_stat = stat
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(self.poll_interval if deadline is None else
+                       max(0.0, min(self.poll_interval, deadline - time.monotonic())))
+
+    def wait(self):
+        """
+        Block until the file has changed, and no more changes have happened during debounce period
+        :return:
+        """
+        while True:
+            if not self._wait_for_event(None):
+                continue
+            # Let the writer finish
+            while self._wait_for_event(self.debounce):
+                pass
+            stat = self._stat()
+            if stat is None or stat == self._last_stat:
+                # Gone, or touched without a change
+                continue
+            self._last_stat = stat
+            return
+
+
+class RegenerationStats:
+    """
+    Counters for regenerations done in watch mode
+    """
+
+    def __init__(self):
+        self.regenerations = 0
+        self.failures = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+
+    def add(self, latency, success):
+        self.regenerations += 1
+        if not success:
+            self.failures += 1
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        self.total_latency += latency
+
+    def as_dict(self):
+        return {
+            'regenerations': self.regenerations,
+            'failures': self.failures,
+            'last_latency_seconds': self.last_latency,
+            'max_latency_seconds': self.max_latency,
+            'average_latency_seconds': self.total_latency / self.regenerations if self.regenerations else 0.0
+        }
+
+    def summary(self):
+        stats = self.as_dict()
+        return "regeneration %d took %.3f s, average %.3f s, max %.3f s, %d failed" % (
+            stats['regenerations'], stats['last_latency_seconds'], stats['average_latency_seconds'],
+            stats['max_latency_seconds'], stats['failures'])
+
+
+def watch_and_regenerate(filename, regenerate, debounce, poll_interval):
+    """
+    Run regenerate() every time given file changes. Never returns.
+    :param filename: File to watch
+    :param regenerate: Callable doing the regeneration, returning False on failure
+    :param debounce: Seconds of quiet to wait for after a change
+    :param poll_interval: Seconds between polls, when inotify is not available
+    :return:
+    """
+    watcher = FileWatcher(filename, Debounce=debounce, PollInterval=poll_interval)
+    stats = RegenerationStats()
+    print("Watching %s for changes using %s." % (filename, watcher.method))
+    try:
+        while True:
+            watcher.wait()
+            print("%s changed, regenerating." % filename)
+            start = time.perf_counter()
+            try:
+                success = regenerate() is not False
+            except Exception as exc:
+                # Keep on watching, the next change might fix it
+                print("Regeneration failed: %s" % exc)
+                success = False
+            stats.add(time.perf_counter() - start, success)
+            print("Watch: %s." % stats.summary())
+    finally:
+        watcher.close()
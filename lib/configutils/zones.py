@@ -0,0 +1,109 @@
+# vim: autoindent tabstop=4 shiftwidth=4 expandtab softtabstop=4 filetype=python
+
+from typing import NamedTuple, Optional
+
+
+class Zone(NamedTuple):
+    """
+    A DNS zone from zone-YAML
+    """
+    name: str
+    dnssec: bool
+    file: str
+    slave: bool
+    # Name of TSIG key for zone transfers, if any
+    key: Optional[str] = None
+
+    @property
+    def conf_name(self):
+        """
+        File name of Bind configuration for this zone, relative to a zone directory
+        """
+        return "%s.conf" % self.name
+
+
+class View(NamedTuple):
+    """
+    A Bind view from zone-YAML
+    """
+    name: str
+    # Address match list elements of the view ACL, eg. 10.0.0.0/8 or key "customer"
+    match_clients: tuple
+    # Names of zones in this view, None for all zones
+    zones: Optional[frozenset] = None
+
+    def has_zone(self, zone_name):
+        return self.zones is None or zone_name in self.zones
+
+
+class ZoneSet:
+    """
+    Ordered collection of zones. Iterating produces Zone-records, indexing is done by zone name.
+    Adding a zone with the same name again replaces the previous one, but keeps its position.
+    Views defined in zone-YAML are in views, in order.
+    """
+    __slots__ = ('_zones', 'views')
+
+    def __init__(self, zones=(), views=()):
+        self._zones = {}
+        self.views = list(views)
+        for zone in zones:
+            self.add(zone)
+
+    def add(self, zone):
+        self._zones[zone.name] = zone
+
+    def __getitem__(self, zone_name):
+        return self._zones[zone_name]
+
+    def __contains__(self, zone_name):
+        return zone_name in self._zones
+
+    def __iter__(self):
+        return iter(self._zones.values())
+
+    def __len__(self):
+        return len(self._zones)
+
+    def names(self):
+        return self._zones.keys()
+
+    def dnssec(self):
+        return (zone for zone in self._zones.values() if zone.dnssec)
+
+    def regular(self):
+        return (zone for zone in self._zones.values() if not zone.dnssec)
+
+    def slaves(self):
+        return (zone for zone in self._zones.values() if zone.slave)
+
+    def view_owners(self):
+        """
+        Find the view each zone is defined in, the first view having it.
+        Other views having the zone refer to that with in-view.
+        :return: dict of zone name and view name, zones not in any view are left out
+        """
+        owners = {}
+        for view in self.views:
+            for zone_name in self._zones if view.zones is None else view.zones:
+                if zone_name in self._zones and zone_name not in owners:
+                    owners[zone_name] = view.name
+
+        return owners
+
+    def changed_names(self, previous):
+        """
+        Names of zones added or changed since previous ZoneSet. Removed zones are not included.
+        :param previous: ZoneSet to compare with
+        :return: set of zone names
+        """
+        if self.views != previous.views:
+            # Zones may have moved between views
+            return set(self._zones)
+        return {zone.name for zone in self._zones.values() if previous._zones.get(zone.name) != zone}
+
+    def removed_names(self, previous):
+        """
+        Names of zones in previous ZoneSet, but not in this one
+        """
+        return {zone_name for zone_name in previous._zones if zone_name not in self._zones}
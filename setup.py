@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 
-from distutils.core import setup
-from setuptools import find_packages
+from setuptools import setup, find_packages
 import pathlib
 
 try:
@@ -30,16 +29,24 @@ setup(name='dnssec-bind-zone-configurator',
           'Topic :: Software Development :: Build Tools',
 
           # Specify the Python versions you support here.
-          'Programming Language :: Python :: 3.5',
-          'Programming Language :: Python :: 3.6',
           'Programming Language :: Python :: 3.7',
+          'Programming Language :: Python :: 3.8',
+          'Programming Language :: Python :: 3.9',
+          'Programming Language :: Python :: 3.10',
+          'Programming Language :: Python :: 3.11',
       ],
-      python_requires='>=3.5, <4',
+      python_requires='>=3.7, <4',
       install_requires=['jinja2', 'appdirs', 'pyaml'],
-      scripts=['dnssec-zone-configurator.py', 'dnssec-zone-configurator-slave.py'],
+      entry_points={
+          'console_scripts': [
+              'dnssec-zone-configurator=lib.cli.master:main',
+              'dnssec-zone-configurator-slave=lib.cli.slave:main',
+              'dnssec-zone-configurator-hosts=lib.cli.hosts:main',
+          ]
+      },
       include_package_data=True,
       data_files=[
           ('%s/templates' % APP_DIRS.site_data_dir, [str(x) for x in pathlib.Path('.').glob('templates/*')])
       ],
-      packages=find_packages(include=['lib.bindutils','lib.configutils'])
+      packages=find_packages(include=['lib.bindutils','lib.configutils','lib.cli'])
       )